@@ -0,0 +1,33 @@
+"""Offline city gazetteer build command.
+
+Converts a GeoNames cities dump (cities500.txt, cities15000.txt, ...,
+tab separated) into the memory mapped index read by the geocoding.
+Only needs GAZETTEER_PATH from the environment, so it also runs at
+image build time.
+
+Usage:
+    python build_gazetteer.py                      -> bundled sample
+    python build_gazetteer.py cities15000.txt      -> GeoNames dump
+    python build_gazetteer.py cities15000.txt --no-alternate-names
+"""
+
+import argparse
+
+from prettyconf import config
+
+from domain.gazetteer import DEFAULT_PATH, SAMPLE_PATH, build_gazetteer
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("source", nargs="?", default=str(SAMPLE_PATH),
+                        help="GeoNames dump, defaults to the bundled sample")
+    parser.add_argument("-o", "--output",
+                        default=config("GAZETTEER_PATH",
+                                       default=str(DEFAULT_PATH)),
+                        help="index file written")
+    parser.add_argument("--no-alternate-names", action="store_true",
+                        help="index only the name and ascii name, "
+                             "a smaller index")
+    args = parser.parse_args()
+    print(build_gazetteer(args.source, args.output,
+                          not args.no_alternate_names))
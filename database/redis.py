@@ -1,5 +1,6 @@
 """Redis database implementation."""
 
+import aioredis
 from prettyconf import config
 from redis import Redis
 
@@ -10,3 +11,4 @@ REDIS_PORT = config("REDIS_PORT")
 redis_url = f"redis://{REDIS_HOST}:{REDIS_PORT}"
 redis_conn = Redis(host=REDIS_HOST, port=REDIS_PORT,
                    db=0, decode_responses=True)
+redis_async = aioredis.from_url(redis_url)
@@ -0,0 +1,95 @@
+"""Hourly temperature forecast of one location."""
+import math
+import struct
+from array import array
+
+# start, step and fetched_at, followed by the float32 temperatures
+HEADER = struct.Struct('<ddd')
+
+
+class ForecastTimeline:
+    """Hourly temperatures, read at any instant by interpolation."""
+
+    __slots__ = ('start', 'step', 'temperatures', 'fetched_at', 'used_at')
+
+    def __init__(self, start: float, step: float, temperatures,
+                 fetched_at: float):
+        """Timeline initialization.
+
+        :param start: epoch of the first hour
+        :param step: seconds between two values
+        :param temperatures: temperature at each hour, None or NaN when
+            missing
+        :param fetched_at: epoch when the forecast was fetched
+        """
+        self.start = start
+        self.step = step or 3600
+        try:
+            self.temperatures = array('f', temperatures)
+        except TypeError:
+            self.temperatures = None
+        if self.temperatures is None \
+                or any(map(math.isnan, self.temperatures)):
+            self.temperatures = self.fill_gaps(temperatures)
+        self.fetched_at = fetched_at
+        self.used_at = fetched_at
+
+    @staticmethod
+    def fill_gaps(temperatures) -> array:
+        """Fill the gaps of the model with the previous hour."""
+        previous = None
+        values = []
+        for temperature in temperatures:
+            if temperature is not None and not math.isnan(temperature):
+                previous = temperature
+            values.append(float('nan') if previous is None else previous)
+        return array('f', values)
+
+    @property
+    def end(self) -> float:
+        """Epoch of the last hour of the timeline."""
+        return self.start + self.step * (len(self.temperatures) - 1)
+
+    def at(self, moment: float) -> float | None:
+        """Temperature at the moment, None outside the timeline.
+
+        :param moment: epoch
+        """
+        if not self.temperatures or not self.start <= moment <= self.end:
+            return None
+        position, rest = divmod(moment - self.start, self.step)
+        position = int(position)
+        before = self.temperatures[position]
+        if position + 1 == len(self.temperatures):
+            value = before
+        else:
+            after = self.temperatures[position + 1]
+            value = before + (after - before) * rest / self.step
+        if value != value:
+            return None
+        return round(value, 1)
+
+    def encode(self) -> bytes:
+        """Compact bytes form, shared between workers."""
+        return (HEADER.pack(self.start, self.step, self.fetched_at)
+                + self.temperatures.tobytes())
+
+    @classmethod
+    def decode(cls, raw: bytes) -> 'ForecastTimeline':
+        """Build the timeline from its compact bytes form."""
+        start, step, fetched_at = HEADER.unpack_from(raw)
+        temperatures = array('f')
+        temperatures.frombytes(raw[HEADER.size:])
+        return cls(start, step, temperatures, fetched_at)
+
+    @classmethod
+    def from_hours(cls, times, temperatures,
+                   fetched_at: float) -> 'ForecastTimeline':
+        """Timeline of the json hourly arrays.
+
+        :param times: epoch of each hour, evenly spaced
+        :param temperatures: temperature at each hour
+        :param fetched_at: epoch when the forecast was fetched
+        """
+        step = times[1] - times[0] if len(times) > 1 else 3600
+        return cls(times[0] if times else 0, step, temperatures, fetched_at)
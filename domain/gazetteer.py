@@ -0,0 +1,210 @@
+"""Offline city gazetteer, a memory mapped index of city names."""
+import csv
+import mmap
+import os
+import struct
+import sys
+import unicodedata
+import zlib
+from pathlib import Path
+
+# Layout, little endian:
+#   header: magic, version, entry count, strings size, crc32 of the body
+#   body: entries sorted by key then population (largest first), then
+#   the utf-8 strings referenced by the entries
+MAGIC = b'PKGAZ1'
+VERSION = 1
+HEADER = struct.Struct('<6sHIII')
+# key offset, key size, name offset, name size, latitude, longitude,
+# population, country code
+ENTRY = struct.Struct('<IHIHffI2s')
+
+DATA_DIR = Path(__file__).parent.parent / 'data' / 'gazetteer'
+# GeoNames sample bundled with the code, and its default index
+SAMPLE_PATH = DATA_DIR / 'cities.txt'
+DEFAULT_PATH = DATA_DIR / 'cities.idx'
+
+
+class GazetteerError(Exception):
+    """Gazetteer file unusable: foreign, other version or corrupted."""
+
+
+def normalize_name(name: str) -> str:
+    """Lookup key of a place: lowercase, no accents, single spaces.
+
+    :param name: name typed by the client
+    """
+    text = unicodedata.normalize('NFKD', name.casefold())
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return ' '.join(text.split())
+
+
+class Gazetteer:
+    """Read-only city index mapped in memory.
+
+    Lookups binary search the sorted entries straight in the mapping, so
+    the file is shared by every worker through the page cache and only
+    the entries touched are read.
+    """
+
+    __slots__ = ('file', 'mem', 'count', 'strings')
+
+    def __init__(self, path):
+        """Map and validate the index file.
+
+        :param path: file written by Gazetteer.write
+        """
+        self.file = open(path, 'rb')
+        try:
+            self.mem = mmap.mmap(self.file.fileno(), 0,
+                                 access=mmap.ACCESS_READ)
+        except ValueError as err:
+            self.file.close()
+            raise GazetteerError(f'{path}: arquivo vazio') from err
+        try:
+            self.check(path)
+        except (GazetteerError, struct.error):
+            self.close()
+            raise
+
+    def check(self, path) -> None:
+        """Validate the header and the checksum of the body."""
+        magic, version, count, strings, crc = HEADER.unpack_from(self.mem)
+        if magic != MAGIC:
+            raise GazetteerError(f'{path}: não é um índice de cidades')
+        if version != VERSION:
+            raise GazetteerError(f'{path}: versão {version} não suportada')
+        if len(self.mem) != HEADER.size + count * ENTRY.size + strings:
+            raise GazetteerError(f'{path}: tamanho inesperado')
+        if zlib.crc32(self.mem[HEADER.size:]) != crc:
+            raise GazetteerError(f'{path}: índice corrompido')
+        self.count = count
+        self.strings = HEADER.size + count * ENTRY.size
+
+    def close(self) -> None:
+        """Unmap the file."""
+        self.mem.close()
+        self.file.close()
+
+    def __len__(self) -> int:
+        """Number of entries (one per name of each city)."""
+        return self.count
+
+    def entry(self, position: int) -> tuple:
+        """Unpacked entry at the position."""
+        return ENTRY.unpack_from(self.mem, HEADER.size + position * ENTRY.size)
+
+    def key(self, position: int) -> bytes:
+        """Key of the entry at the position."""
+        offset, size = struct.unpack_from(
+            '<IH', self.mem, HEADER.size + position * ENTRY.size)
+        start = self.strings + offset
+        return self.mem[start:start + size]
+
+    def lookup(self, query: str, country: str = None) -> dict | None:
+        """Most populous city named as the query.
+
+        :param query: city name, optionally followed by ', CC' with the
+            ISO country code used to disambiguate
+        :param country: ISO country code, overrides the one in query
+        :returns: name, latitude, longitude, country_code and population
+        """
+        name, _, suffix = query.rpartition(',')
+        if name and len(suffix.strip()) == 2:
+            query, country = name, country or suffix.strip()
+        key = normalize_name(query).encode()
+        country = country.upper().encode() if country else None
+
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self.key(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        # Same key entries are sorted by population, largest first
+        for position in range(low, self.count):
+            if self.key(position) != key:
+                break
+            _, _, name_offset, name_size, latitude, longitude, \
+                population, code = self.entry(position)
+            if country and code != country:
+                continue
+            start = self.strings + name_offset
+            return {'name': self.mem[start:start + name_size].decode(),
+                    'latitude': round(latitude, 4),
+                    'longitude': round(longitude, 4),
+                    'country_code': code.rstrip(b'\0').decode() or None,
+                    'population': population}
+        return None
+
+    @staticmethod
+    def write(path, cities) -> int:
+        """Write the index file.
+
+        :param path: destination file
+        :param cities: iterable of (names, name, latitude, longitude,
+            country code, population), names being every spelling the
+            city is searched by
+        :returns: number of entries written
+        """
+        strings = bytearray()
+        offsets = {}
+
+        def intern(text: bytes) -> int:
+            if text not in offsets:
+                offsets[text] = len(strings)
+                strings.extend(text)
+            return offsets[text]
+
+        rows = []
+        for names, name, latitude, longitude, country, population in cities:
+            name_bytes = name.encode()
+            for key in {normalize_name(alias).encode() for alias in names}:
+                if key:
+                    rows.append((key, -population, name_bytes, latitude,
+                                 longitude, country, population))
+        rows.sort()
+
+        entries = bytearray()
+        for key, _, name_bytes, latitude, longitude, country, \
+                population in rows:
+            entries += ENTRY.pack(
+                intern(key), len(key), intern(name_bytes), len(name_bytes),
+                latitude, longitude, population, country.encode()[:2])
+        body = bytes(entries) + bytes(strings)
+        with open(path, 'wb') as file:
+            file.write(HEADER.pack(MAGIC, VERSION, len(rows), len(strings),
+                                   zlib.crc32(body)))
+            file.write(body)
+        return len(rows)
+
+
+def read_geonames(path, alternate_names: bool = True):
+    """Cities of a GeoNames dump, as expected by Gazetteer.write.
+
+    :param path: tab separated GeoNames file (cities500.txt, ...)
+    :param alternate_names: also index the alternate names
+    """
+    csv.field_size_limit(sys.maxsize)
+    with open(path, encoding='utf-8', newline='') as file:
+        for row in csv.reader(file, delimiter='\t', quoting=csv.QUOTE_NONE):
+            names = {row[1], row[2]}
+            if alternate_names and row[3]:
+                names.update(row[3].split(','))
+            yield (names, row[1], float(row[4]), float(row[5]), row[8],
+                   int(row[14] or 0))
+
+
+def build_gazetteer(source, destination,
+                    alternate_names: bool = True) -> int:
+    """Write the index of a GeoNames dump, replacing the previous one at
+    once.
+
+    :returns: number of entries written
+    """
+    os.makedirs(os.path.dirname(destination) or '.', exist_ok=True)
+    temp = f'{destination}.tmp'
+    count = Gazetteer.write(temp, read_geonames(source, alternate_names))
+    os.replace(temp, destination)
+    return count
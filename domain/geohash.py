@@ -0,0 +1,62 @@
+"""Geohash cells, grouping nearby coordinates under one key."""
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+BASE32_VALUE = {char: value for value, char in enumerate(BASE32)}
+
+
+def encode(latitude: float, longitude: float, precision: int) -> str:
+    """Geohash of the cell containing the coordinates.
+
+    :param latitude: degrees, -90 to 90
+    :param longitude: degrees, -180 to 180
+    :param precision: characters of the hash, 5 is a cell of ~5 km
+    """
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    value, bits, even = 0, 0, True
+    while len(chars) < precision:
+        if even:
+            middle = (lon_range[0] + lon_range[1]) / 2
+            if longitude >= middle:
+                value = value << 1 | 1
+                lon_range[0] = middle
+            else:
+                value <<= 1
+                lon_range[1] = middle
+        else:
+            middle = (lat_range[0] + lat_range[1]) / 2
+            if latitude >= middle:
+                value = value << 1 | 1
+                lat_range[0] = middle
+            else:
+                value <<= 1
+                lat_range[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[value])
+            value, bits = 0, 0
+    return ''.join(chars)
+
+
+def center(cell: str) -> tuple:
+    """Latitude and longitude of the center of the cell.
+
+    :param cell: geohash
+    """
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    even = True
+    for char in cell:
+        value = BASE32_VALUE[char]
+        for shift in range(4, -1, -1):
+            bounds = lon_range if even else lat_range
+            middle = (bounds[0] + bounds[1]) / 2
+            if value >> shift & 1:
+                bounds[0] = middle
+            else:
+                bounds[1] = middle
+            even = not even
+    return ((lat_range[0] + lat_range[1]) / 2,
+            (lon_range[0] + lon_range[1]) / 2)
@@ -0,0 +1,87 @@
+"""Prefix and fuzzy search over resource names."""
+import sys
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from difflib import SequenceMatcher
+
+# Minimum similarity (0-1) of a did-you-mean suggestion
+MIN_SIMILARITY = 0.6
+
+# Candidates sharing the most trigrams re-ranked by similarity
+MAX_CANDIDATES = 50
+
+
+class NameIndex:
+    """Sorted names for prefix search plus a trigram index for typos."""
+
+    __slots__ = ('names', 'known', 'grams')
+
+    def __init__(self, names):
+        """Build the index.
+
+        :param names: iterable of lowercase names
+        """
+        self.names = tuple(sorted({sys.intern(name) for name in names}))
+        self.known = frozenset(self.names)
+        grams = {}
+        for position, name in enumerate(self.names):
+            for gram in self.trigrams(name):
+                grams.setdefault(gram, array('I')).append(position)
+        self.grams = grams
+
+    def __contains__(self, name: str) -> bool:
+        """True when the name exists."""
+        return name in self.known
+
+    def __len__(self) -> int:
+        """Number of names."""
+        return len(self.names)
+
+    @staticmethod
+    def trigrams(text: str) -> set:
+        """Trigrams of the text padded at both ends."""
+        padded = f'  {text} '
+        return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+    def prefix(self, query: str, limit: int) -> list:
+        """Names starting with the query, in alphabetical order.
+
+        :param query: lowercase prefix
+        :param limit: maximum number of names
+        """
+        found = []
+        for name in self.names[bisect_left(self.names, query):]:
+            if not name.startswith(query) or len(found) >= limit:
+                break
+            found.append(name)
+        return found
+
+    def similar(self, query: str, limit: int) -> list:
+        """Names close to the query, most similar first.
+
+        :param query: lowercase name, possibly misspelled
+        :param limit: maximum number of names
+        """
+        shared = Counter()
+        for gram in self.trigrams(query):
+            shared.update(self.grams.get(gram, ()))
+        scored = []
+        for position, _ in shared.most_common(MAX_CANDIDATES):
+            name = self.names[position]
+            ratio = SequenceMatcher(None, query, name).ratio()
+            if ratio >= MIN_SIMILARITY:
+                scored.append((-ratio, name))
+        return [name for _, name in sorted(scored)[:limit]]
+
+    def search(self, query: str, limit: int) -> list:
+        """Prefix matches completed with similar names.
+
+        :param query: lowercase text typed by the client
+        :param limit: maximum number of names
+        """
+        found = self.prefix(query, limit)
+        if len(found) < limit:
+            found += [name for name in self.similar(query, limit)
+                      if name not in found][:limit - len(found)]
+        return found
@@ -0,0 +1,111 @@
+"""PokeAPI local mirror ingestion."""
+
+import asyncio
+
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.pokeapi_mirror import MIRROR_RESOURCES, PokeApiMirrorDTO
+from services.http_client import HttpClient
+from services.pokeapi import Pokemon
+from settings.sys_logger import SysLog, TypeLog
+
+# Resources fetched and committed per round, bounding memory use
+CHUNK_SIZE = 50
+
+
+class PokeApiMirrorSync:
+    """Pull PokeAPI resources into the local mirror tables."""
+
+    def __init__(self, session: AsyncSession, incremental: bool = True):
+        """Class initialization.
+
+        :param session: database session
+        :param incremental: only fetch new or changed resources
+        """
+        self.session = session
+        self.incremental = incremental
+        self.url = Pokemon().url
+        self.dto = PokeApiMirrorDTO(session)
+
+    async def sync(self, resources: list = None) -> dict:
+        """Synchronize the mirror.
+
+        :param resources: PokeAPI resources, defaults to all mirrored
+        :returns: counters of the synchronization by resource
+        """
+        report = {}
+        for resource in resources or list(MIRROR_RESOURCES):
+            report[resource] = await self.sync_resource(resource)
+            msg = (f"Espelho PokeAPI {resource} sincronizado: "
+                   f"{report[resource]}")
+            SysLog(__name__).show_log(TypeLog.info.value, msg)
+        return report
+
+    async def sync_resource(self, resource: str) -> dict:
+        """Synchronize every item of one resource.
+
+        :param resource: PokeAPI resource name
+        """
+        listed = await self.list_resource(resource)
+        etags = await self.dto.get_etags(resource)
+        counters = {'listed': len(listed), 'updated': 0,
+                    'unchanged': 0, 'failed': 0, 'deleted': 0}
+
+        names = list(listed)
+        for start in range(0, len(names), CHUNK_SIZE):
+            chunk = names[start:start + CHUNK_SIZE]
+            results = await asyncio.gather(
+                *[self.fetch(listed[name], etags.get(name))
+                  for name in chunk])
+            rows = []
+            for row in results:
+                if row is None:
+                    counters['failed'] += 1
+                elif row is False:
+                    counters['unchanged'] += 1
+                else:
+                    rows.append(row)
+            await self.dto.upsert(resource, rows)
+            counters['updated'] += len(rows)
+
+        missing = set(etags) - set(listed)
+        await self.dto.delete_missing(resource, missing)
+        counters['deleted'] = len(missing)
+        return counters
+
+    async def list_resource(self, resource: str) -> dict:
+        """Get the name and url of every item of the resource."""
+        response = await HttpClient.get(f'{self.url}{resource}/',
+                                        params={'limit': 100000})
+        response.raise_for_status()
+        return {item['name']: item['url']
+                for item in response.json()['results']}
+
+    async def fetch(self, url: str, etag: str | None) -> dict | bool | None:
+        """Fetch one resource item.
+
+        :param url: url of the item
+        :param etag: mirrored etag, revalidated in incremental mode
+        :returns: row to upsert, False if unchanged or None if failed
+        """
+        headers = {}
+        if self.incremental and etag:
+            headers['If-None-Match'] = etag
+        try:
+            response = await HttpClient.get(url, headers=headers)
+        except HTTPException as err:
+            msg = f"Falha ao espelhar {url}: {err.detail}"
+            SysLog(__name__).show_log(TypeLog.warning.value, msg)
+            return None
+        if response.status_code == 304:
+            return False
+        if response.status_code != 200:
+            return None
+
+        data = response.json()
+        new_etag = response.headers.get('etag')
+        if self.incremental and etag and new_etag == etag:
+            return False
+        return {'id': data['id'], 'name': data['name'],
+                'etag': new_etag, 'payload': response.text}
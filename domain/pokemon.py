@@ -1,36 +1,188 @@
 """Pokémon research json data ."""
 import random
+import string
+import sys
+from array import array
 from typing import Any
 
+LETTER_BITS = {letter: 1 << bit
+               for bit, letter in enumerate(string.ascii_lowercase)}
+
+# Top level keys of the PokeAPI pokemon document
+POKEMON_FIELDS = frozenset((
+    'abilities', 'base_experience', 'cries', 'forms', 'game_indices',
+    'height', 'held_items', 'id', 'is_default', 'location_area_encounters',
+    'moves', 'name', 'order', 'past_abilities', 'past_types', 'species',
+    'sprites', 'stats', 'types', 'weight'))
+
+SUMMARY_FIELDS = ('abilities', 'base_experience', 'height', 'id', 'name',
+                  'stats', 'types', 'weight')
+
+# Order of the values in PokemonRecord.stats
+STAT_NAMES = ('hp', 'attack', 'defense', 'special-attack',
+              'special-defense', 'speed')
+STAT_POSITION = {stat: position for position, stat in enumerate(STAT_NAMES)}
+
+
+class AbilityRecord:
+    """Ability of a pokémon."""
+
+    __slots__ = ('name', 'hidden')
+
+    def __init__(self, name: str, hidden: bool):
+        """Ability initialization.
+
+        :param name: interned ability name
+        :param hidden: True for the hidden ability
+        """
+        self.name = name
+        self.hidden = hidden
+
+
+class PokemonRecord:
+    """Fields of a pokémon used by the rules, without the raw document.
+
+    Type and ability names repeat across thousands of pokémon and are
+    interned, so every record shares the same string objects.
+    """
+
+    __slots__ = ('id', 'name', 'types', 'abilities', 'stats', 'height',
+                 'weight', 'base_experience')
+
+    def __init__(self, poke_id: int, name: str, types: tuple,
+                 abilities: tuple, stats: array, height: int = 0,
+                 weight: int = 0, base_experience: int = 0):
+        """Record initialization.
+
+        :param poke_id: PokeAPI id
+        :param name: pokémon name
+        :param types: type names, by slot
+        :param abilities: AbilityRecord tuple, by slot
+        :param stats: base stats in STAT_NAMES order
+        """
+        self.id = poke_id
+        self.name = name
+        self.types = types
+        self.abilities = abilities
+        self.stats = stats
+        self.height = height
+        self.weight = weight
+        self.base_experience = base_experience
+
+    @classmethod
+    def from_data(cls, poke_data: dict) -> 'PokemonRecord':
+        """Build the record from the PokeAPI pokemon document.
+
+        :param poke_data: dict
+        """
+        stats = array('H', bytes(2 * len(STAT_NAMES)))
+        for stat in poke_data.get('stats', ()):
+            position = STAT_POSITION.get(stat['stat']['name'])
+            if position is not None:
+                stats[position] = stat['base_stat']
+        return cls(
+            poke_data['id'],
+            sys.intern(poke_data['name']),
+            tuple(sys.intern(poke_type['type']['name'])
+                  for poke_type in poke_data.get('types', ())),
+            tuple(AbilityRecord(sys.intern(ability['ability']['name']),
+                                ability['is_hidden'])
+                  for ability in poke_data.get('abilities', ())),
+            stats,
+            poke_data.get('height') or 0,
+            poke_data.get('weight') or 0,
+            poke_data.get('base_experience') or 0)
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate bytes held by the record, interned names aside."""
+        return (sys.getsizeof(self) + sys.getsizeof(self.types)
+                + sys.getsizeof(self.abilities)
+                + sum(map(sys.getsizeof, self.abilities))
+                + sys.getsizeof(self.stats))
+
+    def stat(self, name: str) -> int | None:
+        """Base value of a stat, None for unknown stat names."""
+        position = STAT_POSITION.get(name)
+        return None if position is None else self.stats[position]
+
+
+class PokemonTypeIndex:
+    """Names of the pokémon of one type, indexed once per loaded type."""
+
+    __slots__ = ('names', 'masks', 'longest', 'letter_matches')
+
+    def __init__(self, type_data: dict):
+        """Build the index from the PokeAPI type document.
+
+        :param type_data: dict
+        """
+        self.names = tuple(sys.intern(poke['pokemon']['name'])
+                           for poke in type_data['pokemon'])
+        self.masks = array('L', map(self.letters_mask, self.names))
+        self.longest = max(self.names, key=len) if self.names else None
+        self.letter_matches = {}
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate bytes held by the index, interned names aside."""
+        return (sys.getsizeof(self) + sys.getsizeof(self.names)
+                + sys.getsizeof(self.masks)
+                + sum(map(sys.getsizeof, self.letter_matches.values())))
+
+    @staticmethod
+    def letters_mask(text: str) -> int:
+        """Bitmask of the lowercase letters present in text."""
+        mask = 0
+        for char in set(text):
+            mask |= LETTER_BITS.get(char, 0)
+        return mask
+
+    def with_any_letter(self, letters) -> tuple:
+        """Names containing at least one of the letters, cached by query.
+
+        :param letters: lowercase ascii letters
+        """
+        query = self.letters_mask(letters)
+        if query not in self.letter_matches:
+            self.letter_matches[query] = tuple(
+                name for name, mask in zip(self.names, self.masks)
+                if mask & query)
+        return self.letter_matches[query]
+
 
 class Pokemon:
     """Pokémon class."""
 
-    def __init__(self, poke_data: dict, poke_type=False):
+    def __init__(self, poke_data: dict = None, poke_type=False,
+                 index: PokemonTypeIndex = None,
+                 record: PokemonRecord = None):
         """Pokémon constructor.
 
         :param poke_data: dict
         :param poke_type: True if poke type selected
+        :param index: prebuilt index of the type, reused across requests
+        :param record: prebuilt record of the pokémon, reused across
+            requests
         """
-        self.poke_data = poke_data
         self.type = poke_type
         self.letter = ['i', 'a', 'm']
+        if self.type and index is None:
+            index = PokemonTypeIndex(poke_data)
+        self.index = index
+        if not self.type and record is None and poke_data is not None:
+            record = PokemonRecord.from_data(poke_data)
+        self.record = record
 
     async def get_abilities(self):
         """Get abilities.
 
         :return: dict with abilities
         """
-        abilities = []
         if self.type:
-            return abilities
-
-        for i in range(0, len(self.poke_data['abilities'])):
-            hidden = self.poke_data['abilities'][i]['is_hidden']
-            name = self.poke_data['abilities'][i]['ability']['name']
-            abilities.append({'isHidden': hidden, 'name': name})
-
-        return abilities
+            return []
+        return [{'isHidden': ability.hidden, 'name': ability.name}
+                for ability in self.record.abilities]
 
     async def get_name(self):
         """Get name.
@@ -39,19 +191,14 @@ class Pokemon:
         """
         if self.type:
             return None
-        return self.poke_data['name']
+        return self.record.name
 
     async def get_types(self) -> list:
         """Get types of pokémon.
         :returns: possibles names types (fire, water, earth, normal, ...)"""
-        types = []
         if self.type:
-            return types
-
-        for i in range(0, len(self.poke_data['types'])):
-            name = self.poke_data['types'][i]['type']['name']
-            types.append({'name': name})
-        return types
+            return []
+        return [{'name': name} for name in self.record.types]
 
     async def get_random_pokemon_types(self) -> Any | None:
         """Get one pokémon randomly selected by specify type.
@@ -60,26 +207,18 @@ class Pokemon:
         if not self.type:
             return pokemon
 
-        if len(self.poke_data['pokemon']) > 0:
-            pokemon = [poke['pokemon']['name']
-                       for poke in self.poke_data['pokemon']]
-            pokemon = random.choice(pokemon)
+        if self.index.names:
+            pokemon = random.choice(self.index.names)
 
         return pokemon
 
     async def get_larger_pokemon_name(self) -> Any | None:
         """Get pokémon with larger name selected by specify type.
         :returns: larger pokémon name"""
-        pokemon = None
         if not self.type:
-            return pokemon
-
-        if len(self.poke_data['pokemon']) > 0:
-            pokemon = [poke['pokemon']['name']
-                       for poke in self.poke_data['pokemon']]
-            pokemon = max(pokemon, key=len)
+            return None
 
-        return pokemon
+        return self.index.longest
 
     async def get_pokemon_name_in_letter(self) -> Any | None:
         """Get pokémon with letter in name with random
@@ -90,26 +229,18 @@ class Pokemon:
         if not self.type:
             return pokemon
 
-        if len(self.poke_data['pokemon']) > 0:
-            pokemon = [poke['pokemon']['name']
-                       for poke in self.poke_data['pokemon']]
-            contains = []
-            for letter in self.letter:
-                for poke_name in pokemon:
-                    if letter in poke_name:
-                        await self.set_contains(poke_name, contains)
+        contains = self.index.with_any_letter(''.join(self.letter))
+        if contains:
             pokemon = random.choice(contains)
         return pokemon
 
     @staticmethod
-    async def set_contains(poke_name, contains):
-        """Append pokémon name in contains.
+    def project(poke_data: dict, fields) -> dict:
+        """Keep only the given top level fields of the pokémon document.
 
-        :param poke_name: pokémon name
-        :param contains: list of pokémon names
+        :param poke_data: dict
+        :param fields: names of the fields kept
+        :returns: projected document
         """
-        if poke_name not in contains:
-            contains.append(poke_name)
-
-
-
+        return {field: poke_data[field]
+                for field in fields if field in poke_data}
@@ -0,0 +1,285 @@
+"""Local stand-in for PokeAPI, Open-Meteo and Open-Meteo geocoding.
+
+Serves the recorded payloads in fixtures/ and deterministic synthetic
+ones for everything else, so the service can be load tested without
+touching (and being rate limited by) the public APIs.
+
+Run it and point the service to it:
+    uvicorn fake_upstream.app:app --port 8090
+    POKEAPI_URL=http://localhost:8090/api/v2/
+    OPEN_METEO_URL=http://localhost:8090/v1/forecast
+    GEOCODING_URL=http://localhost:8090/v1/search
+
+Behaviour knobs (environment variables):
+    FAKE_UPSTREAM_LATENCY_MS   mean added latency per request
+    FAKE_UPSTREAM_JITTER_MS    uniform jitter around the mean
+    FAKE_UPSTREAM_ERROR_RATE   fraction (0-1) of requests answering 503
+    FAKE_UPSTREAM_MOVES        moves per synthetic pokémon (payload size)
+    FAKE_UPSTREAM_TYPE_SIZE    synthetic pokémon per type
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+import random
+import time
+from pathlib import Path
+
+import flatbuffers
+from fastapi import FastAPI, Request
+from prettyconf import config
+from starlette.responses import JSONResponse, Response
+
+LATENCY_MS = float(config("FAKE_UPSTREAM_LATENCY_MS", default="50"))
+JITTER_MS = float(config("FAKE_UPSTREAM_JITTER_MS", default="20"))
+ERROR_RATE = float(config("FAKE_UPSTREAM_ERROR_RATE", default="0"))
+MOVES = int(config("FAKE_UPSTREAM_MOVES", default="80"))
+TYPE_SIZE = int(config("FAKE_UPSTREAM_TYPE_SIZE", default="60"))
+
+FIXTURES = Path(__file__).parent / "fixtures"
+POKEAPI = "https://pokeapi.co/api/v2/"
+
+TYPES = ('normal', 'fighting', 'flying', 'poison', 'ground', 'rock', 'bug',
+         'ghost', 'steel', 'fire', 'water', 'grass', 'electric', 'psychic',
+         'ice', 'dragon', 'dark', 'fairy')
+STATS = ('hp', 'attack', 'defense', 'special-attack', 'special-defense',
+         'speed')
+
+app = FastAPI(title="PokeService fake upstream")
+
+
+def seed(text: str) -> int:
+    """Stable number derived from text."""
+    return int(hashlib.sha1(text.encode()).hexdigest()[:8], 16)
+
+
+def load_fixture(*parts: str) -> dict | None:
+    """Recorded payload, if there is one."""
+    path = FIXTURES.joinpath(*parts)
+    if not path.is_file():
+        return None
+    return json.loads(path.read_text())
+
+
+def synthetic_names(type_name: str) -> list:
+    """Members of a synthetic type."""
+    return [f"{type_name}mon-{number}" for number in range(TYPE_SIZE)]
+
+
+def synthetic_pokemon(name: str) -> dict | None:
+    """Pokémon document shaped like PokeAPI, for {type}mon-{n} names."""
+    type_name, _, number = name.partition('mon-')
+    if type_name not in TYPES or not number.isdigit() \
+            or int(number) >= TYPE_SIZE:
+        return None
+    rand = random.Random(seed(name))
+    poke_id = 10000 + TYPES.index(type_name) * 1000 + int(number)
+    return {
+        'abilities': [{'ability': {'name': f'ability-{rand.randint(1, 300)}',
+                                   'url': f'{POKEAPI}ability/1/'},
+                       'is_hidden': slot == 3, 'slot': slot}
+                      for slot in (1, 3)],
+        'base_experience': rand.randint(40, 300),
+        'height': rand.randint(2, 40),
+        'id': poke_id,
+        'is_default': True,
+        'moves': [{'move': {'name': f'move-{rand.randint(1, 900)}',
+                            'url': f'{POKEAPI}move/1/'},
+                   'version_group_details': [
+                       {'level_learned_at': rand.randint(1, 60),
+                        'move_learn_method': {'name': 'level-up'}}]}
+                  for _ in range(MOVES)],
+        'name': name,
+        'order': poke_id,
+        'species': {'name': name,
+                    'url': f'{POKEAPI}pokemon-species/{poke_id}/'},
+        'sprites': {'front_default': None},
+        'stats': [{'base_stat': rand.randint(20, 150), 'effort': 0,
+                   'stat': {'name': stat, 'url': f'{POKEAPI}stat/1/'}}
+                  for stat in STATS],
+        'types': [{'slot': 1, 'type': {'name': type_name,
+                                       'url': f'{POKEAPI}type/1/'}}],
+        'weight': rand.randint(10, 2000),
+    }
+
+
+def synthetic_type(name: str) -> dict | None:
+    """Type document shaped like PokeAPI."""
+    if name not in TYPES:
+        return None
+    members = synthetic_names(name)
+    if name == 'electric':
+        members = ['pikachu'] + members
+    return {
+        'id': TYPES.index(name) + 1,
+        'name': name,
+        'pokemon': [{'pokemon': {'name': member,
+                                 'url': f'{POKEAPI}pokemon/{member}/'},
+                     'slot': 1}
+                    for member in members],
+    }
+
+
+async def upstream_behaviour() -> Response | None:
+    """Configured latency, and an error for a fraction of requests."""
+    delay = LATENCY_MS + random.uniform(-JITTER_MS, JITTER_MS)
+    if delay > 0:
+        await asyncio.sleep(delay / 1000)
+    if random.random() < ERROR_RATE:
+        return Response(status_code=503)
+    return None
+
+
+def json_with_etag(request: Request, document: dict) -> Response:
+    """Json answer honouring If-None-Match, like PokeAPI."""
+    body = json.dumps(document).encode()
+    etag = f'W/"{hashlib.md5(body).hexdigest()}"'
+    if request.headers.get('if-none-match') == etag:
+        return Response(status_code=304, headers={'ETag': etag})
+    return Response(body, media_type='application/json',
+                    headers={'ETag': etag})
+
+
+@app.get("/api/v2/{resource}/")
+async def list_resource(resource: str, request: Request, limit: int = 20,
+                        offset: int = 0):
+    """PokeAPI resource list, the urls pointing back to this fake."""
+    error = await upstream_behaviour()
+    if error:
+        return error
+    if resource == 'type':
+        names = list(TYPES)
+    elif resource == 'pokemon':
+        names = ['pikachu'] + [name for type_name in TYPES
+                               for name in synthetic_names(type_name)]
+    else:
+        names = []
+    page = names[offset:offset + limit]
+    # Followed by the mirror sync, so they must not reach pokeapi.co
+    base = f'{request.base_url}api/v2/{resource}/'
+    return {'count': len(names),
+            'results': [{'name': name, 'url': f'{base}{name}/'}
+                        for name in page]}
+
+
+@app.get("/api/v2/{resource}/{name}")
+async def get_resource(resource: str, name: str, request: Request):
+    """PokeAPI pokemon and type documents."""
+    error = await upstream_behaviour()
+    if error:
+        return error
+    name = name.strip('/')
+    document = load_fixture(resource, f'{name}.json')
+    if document is None and resource == 'pokemon':
+        document = synthetic_pokemon(name)
+    if document is None and resource == 'type':
+        document = synthetic_type(name)
+    if document is None:
+        return Response('Not Found', status_code=404)
+    return json_with_etag(request, document)
+
+
+@app.get("/v1/search")
+async def geocoding(name: str, count: int = 10):
+    """Open-Meteo geocoding search, cities named nowhere* are unknown."""
+    error = await upstream_behaviour()
+    if error:
+        return error
+    key = name.strip().lower()
+    if key.startswith('nowhere'):
+        return {'generationtime_ms': 0.1}
+    city = load_fixture('geocoding.json').get(key)
+    if city is None:
+        rand = random.Random(seed(key))
+        city = {'name': name, 'latitude': round(rand.uniform(-33, 5), 4),
+                'longitude': round(rand.uniform(-73, -35), 4),
+                'country_code': 'BR', 'population': rand.randint(1, 10 ** 6)}
+    return {'results': [{'id': seed(key), **city}][:count],
+            'generationtime_ms': 0.1}
+
+
+def temperature_at(latitude: float, longitude: float,
+                   moment: float) -> float:
+    """Plausible temperature for the coordinates, with a daily cycle."""
+    rand = random.Random(seed(f'{latitude:.2f},{longitude:.2f}'))
+    hour = (moment / 3600 + longitude / 15) % 24
+    daily = 5 * math.sin((hour - 9) / 24 * 2 * math.pi)
+    return round(32 - abs(latitude) * 0.6 + rand.uniform(-8, 8) + daily, 1)
+
+
+def flatbuffers_message(latitude: float, longitude: float,
+                        hours: list) -> bytes:
+    """Size prefixed WeatherApiResponse with the hourly temperature_2m.
+
+    Built slot by slot, openmeteo_sdk only ships the readers.
+    """
+    builder = flatbuffers.Builder(64 + 4 * len(hours))
+    builder.StartVector(4, len(hours), 4)
+    for hour in reversed(hours):
+        builder.PrependFloat32(temperature_at(latitude, longitude, hour))
+    values = builder.EndVector()
+    # VariableWithValues: variable, unit, values, altitude
+    builder.StartObject(6)
+    builder.PrependUOffsetTRelativeSlot(3, values, 0)
+    builder.PrependInt16Slot(5, 2, 0)
+    builder.PrependUint8Slot(0, 47, 0)
+    builder.PrependUint8Slot(1, 1, 0)
+    variable = builder.EndObject()
+    builder.StartVector(4, 1, 4)
+    builder.PrependUOffsetTRelative(variable)
+    variables = builder.EndVector()
+    # VariablesWithTime: time, time_end, interval, variables
+    builder.StartObject(4)
+    builder.PrependInt64Slot(0, hours[0] if hours else 0, 0)
+    builder.PrependInt64Slot(1, hours[-1] + 3600 if hours else 0, 0)
+    builder.PrependUOffsetTRelativeSlot(3, variables, 0)
+    builder.PrependInt32Slot(2, 3600, 0)
+    hourly = builder.EndObject()
+    # WeatherApiResponse: latitude, longitude, ..., hourly
+    builder.StartObject(12)
+    builder.PrependUOffsetTRelativeSlot(11, hourly, 0)
+    builder.PrependFloat32Slot(0, latitude, 0)
+    builder.PrependFloat32Slot(1, longitude, 0)
+    builder.Finish(builder.EndObject())
+    message = builder.Output()
+    return len(message).to_bytes(4, 'little') + message
+
+
+@app.get("/v1/forecast")
+async def forecast(latitude: str, longitude: str, current: str = None,
+                   hourly: str = None, past_hours: int = 0,
+                   forecast_hours: int = 168, format: str = 'json'):
+    """Open-Meteo forecast, with comma separated coordinate lists.
+
+    Answers current=temperature_2m and/or hourly=temperature_2m, the
+    hourly times always in unixtime. format=flatbuffers answers the
+    hourly temperature_2m as size prefixed WeatherApiResponse messages.
+    """
+    error = await upstream_behaviour()
+    if error:
+        return error
+    now = time.time()
+    first_hour = int(now // 3600 * 3600) - past_hours * 3600
+    hours = [first_hour + 3600 * i for i in range(past_hours
+                                                    + forecast_hours)]
+    if format == 'flatbuffers':
+        return Response(b''.join(
+            flatbuffers_message(float(lat), float(lon), hours)
+            for lat, lon in zip(latitude.split(','), longitude.split(','))),
+            media_type='application/x-flatbuffers')
+    points = []
+    for lat, lon in zip(latitude.split(','), longitude.split(',')):
+        lat, lon = float(lat), float(lon)
+        point = {'latitude': lat, 'longitude': lon}
+        if current:
+            point['current_units'] = {'temperature_2m': '°C'}
+            point['current'] = {'temperature_2m':
+                                temperature_at(lat, lon, now)}
+        if hourly:
+            point['hourly_units'] = {'time': 'unixtime',
+                                     'temperature_2m': '°C'}
+            point['hourly'] = {'time': hours, 'temperature_2m': [
+                temperature_at(lat, lon, hour) for hour in hours]}
+        points.append(point)
+    return JSONResponse(points if len(points) > 1 else points[0])
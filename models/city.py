@@ -0,0 +1,49 @@
+"""Geocoded city model implementation."""
+
+from sqlalchemy import Column, Float, Integer, String
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from models.abstract import BaseModel
+
+
+class City(BaseModel):
+    """City resolved by the geocoding API, coordinates never change."""
+
+    __tablename__ = 'geocoded_city'
+    id = Column(Integer, primary_key=True, index=True)
+    key = Column(String(200), unique=True, index=True, nullable=False)
+    name = Column(String(200), nullable=False)
+    latitude = Column(Float, nullable=False)
+    longitude = Column(Float, nullable=False)
+    country_code = Column(String(2), nullable=True)
+    population = Column(Integer, nullable=True)
+
+
+class CityDTO:
+    """Geocoded city data transfer object."""
+
+    def __init__(self, session: AsyncSession) -> None:
+        """Class initialization."""
+        self.session = session
+
+    async def get_by_key(self, key: str) -> dict | None:
+        """Get the coordinates of a city by its normalized name."""
+        query = select(City.name, City.latitude, City.longitude,
+                       City.country_code, City.population).where(
+            City.key == key)
+        row = (await self.session.execute(query)).first()
+
+        return dict(row._mapping) if row else None
+
+    async def save(self, key: str, city: dict) -> None:
+        """Store a resolved city, keeping the first one stored.
+
+        :param key: normalized name searched
+        :param city: name, latitude, longitude, country_code, population
+        """
+        query = insert(City).values(key=key, **city)
+        await self.session.execute(
+            query.on_conflict_do_nothing(index_elements=[City.key]))
+        await self.session.commit()
@@ -0,0 +1,120 @@
+"""PokeAPI local mirror models implementation."""
+
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, String, Text, DateTime, delete
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from models.abstract import BaseModel
+
+
+class PokeApiMirror(BaseModel):
+    """Base of the mirrored PokeAPI resources."""
+
+    __abstract__ = True
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    name = Column(String(100), unique=True, index=True, nullable=False)
+    etag = Column(String(128), nullable=True)
+    payload = Column(Text, nullable=False)
+    synced_at = Column(DateTime, nullable=False)
+
+
+class PokemonMirror(PokeApiMirror):
+    """Mirror of the PokeAPI pokemon resource."""
+
+    __tablename__ = 'pokeapi_pokemon'
+
+
+class TypeMirror(PokeApiMirror):
+    """Mirror of the PokeAPI type resource."""
+
+    __tablename__ = 'pokeapi_type'
+
+
+class AbilityMirror(PokeApiMirror):
+    """Mirror of the PokeAPI ability resource."""
+
+    __tablename__ = 'pokeapi_ability'
+
+
+class SpeciesMirror(PokeApiMirror):
+    """Mirror of the PokeAPI pokemon-species resource."""
+
+    __tablename__ = 'pokeapi_species'
+
+
+MIRROR_RESOURCES = {
+    'pokemon': PokemonMirror,
+    'type': TypeMirror,
+    'ability': AbilityMirror,
+    'pokemon-species': SpeciesMirror,
+}
+
+
+class PokeApiMirrorDTO:
+    """PokeAPI mirror data transfer object."""
+
+    def __init__(self, session: AsyncSession) -> None:
+        """Class initialization."""
+        self.session = session
+
+    async def get_payload(self, resource: str, name: str) -> str | None:
+        """Get the raw json of a resource by name or id."""
+        model = MIRROR_RESOURCES[resource]
+        if name.isdigit():
+            query = select(model.payload).where(model.id == int(name))
+        else:
+            query = select(model.payload).where(model.name == name)
+
+        result = await self.session.execute(query)
+
+        return result.scalar()
+
+    async def get_etags(self, resource: str) -> dict:
+        """Get name and etag of every mirrored resource."""
+        model = MIRROR_RESOURCES[resource]
+        result = await self.session.execute(select(model.name, model.etag))
+
+        return {name: etag for name, etag in result.all()}
+
+    async def get_names(self, resource: str) -> list:
+        """Get the name of every mirrored resource."""
+        model = MIRROR_RESOURCES[resource]
+        result = await self.session.execute(select(model.name))
+
+        return list(result.scalars())
+
+    async def upsert(self, resource: str, rows: list) -> None:
+        """Insert or update mirrored resources.
+
+        :param resource: PokeAPI resource name
+        :param rows: dicts with id, name, etag and payload
+        """
+        if not rows:
+            return
+        model = MIRROR_RESOURCES[resource]
+        now = datetime.utcnow()
+        for row in rows:
+            row.update(synced_at=now, created_at=now, updated_at=now)
+
+        query = insert(model).values(rows)
+        query = query.on_conflict_do_update(
+            index_elements=[model.id],
+            set_={'name': query.excluded.name,
+                  'etag': query.excluded.etag,
+                  'payload': query.excluded.payload,
+                  'synced_at': query.excluded.synced_at,
+                  'updated_at': query.excluded.updated_at})
+        await self.session.execute(query)
+        await self.session.commit()
+
+    async def delete_missing(self, resource: str, names: set) -> None:
+        """Delete mirrored resources no longer listed by PokeAPI."""
+        if not names:
+            return
+        model = MIRROR_RESOURCES[resource]
+        await self.session.execute(
+            delete(model).where(model.name.in_(names)))
+        await self.session.commit()
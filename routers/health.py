@@ -1,6 +1,14 @@
 """Liveness router check implementation."""
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
+from fastapi_jwt_auth import AuthJWT
+
+from services.cache import NegativeCache, TieredCache
+from services.cache_snapshot import CacheSnapshot
+from services.geocoding import Geocoding
+from services.http_client import HttpClient
+from services.meteo import temperature_grid
+from services.temperature_types import TemperatureTypes
 
 router = APIRouter(tags=['Health'])
 
@@ -9,3 +17,49 @@ router = APIRouter(tags=['Health'])
 async def get_health() -> dict:
     """Get all health for liveness."""
     return dict(status="OK")
+
+
+@router.get('/v1/health/cache')
+async def get_cache_health() -> dict:
+    """Get hit and miss counters of the upstream caches by tier."""
+    return TieredCache.report()
+
+
+@router.get('/v1/health/cache/negative')
+async def get_negative_cache_health() -> dict:
+    """Get hits and size of the caches of names missing upstream."""
+    return NegativeCache.report()
+
+
+@router.post('/v1/health/cache/snapshot')
+async def save_cache_snapshot(auth_jwt: AuthJWT = Depends()) -> dict:
+    """Write the caches of this worker to their snapshot files.
+    :param auth_jwt: Auth check with jwt
+    :return entries written by cache
+    """
+    auth_jwt.jwt_required()
+    return await CacheSnapshot.save_all()
+
+
+@router.get('/v1/health/upstreams')
+async def get_upstreams_health() -> dict:
+    """Get circuit state, retry budget and latency of the upstreams."""
+    return HttpClient.report()
+
+
+@router.get('/v1/health/geocoding')
+async def get_geocoding_health() -> dict:
+    """Get where the cities were resolved: LRU, store or API."""
+    return Geocoding.report()
+
+
+@router.get('/v1/health/meteo')
+async def get_meteo_health() -> dict:
+    """Get hits of the temperature grid and upstream batching."""
+    return temperature_grid.report()
+
+
+@router.get('/v1/health/hot_set')
+async def get_hot_set_health() -> dict:
+    """Get hits and pinned pokémon of the temperature types."""
+    return TemperatureTypes.report()
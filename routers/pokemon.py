@@ -1,37 +1,176 @@
 """Service router for Pokémon API."""
 
-from fastapi import APIRouter, Depends
+import asyncio
+
+import orjson
+from fastapi import APIRouter, Depends, Query, Request
 from fastapi_jwt_auth import AuthJWT
+from starlette.responses import StreamingResponse
 
 from schemas.meteo import MeteoSchema
+from schemas.pokemon import PokemonView, PokemonBatchSchema
 from services.geocoding import Geocoding
-from services.meteo import OpenMeteoService
-from services.pokeapi import Pokemon
-from domain.pokemon import Pokemon as PokeRules
+from services.meteo import OpenMeteoService, TEMPERATURE_TYPES
+from services.pokeapi import Pokemon, no_pokemon, no_type, no_type_pokemon
+from services.pokemon_names import PokemonNames
+from services.temperature_types import TemperatureTypes
+from domain.pokemon import (Pokemon as PokeRules, POKEMON_FIELDS,
+                            SUMMARY_FIELDS)
+from settings.infra import (NAME_SEARCH_MAX_RESULTS,
+                            PIPELINE_SPECULATION_ENABLED,
+                            PIPELINE_GEOCODING_BUDGET_MS,
+                            PIPELINE_METEO_BUDGET_MS,
+                            PIPELINE_POKEMON_BUDGET_MS)
+from utils.json_response import RawJSONResponse
 from utils.utils import Utils
 
 router = APIRouter(tags=["Pokemon"], prefix="/pokemon")
 
-no_pokemon = "Pokemon não encontrado com este nome: {}"
-no_type_pokemon = "Sem pokémon para este typo {}!"
-no_type = "Tipo de pokémon não encontrado com este nome: {}"
+invalid_fields = "Campos de pokémon inválidos: {}"
+no_name_index = "Busca de nomes indisponível, tente novamente mais tarde."
+no_city = "Cidade não encontrada com este nome: {}"
+stage_timeout = "Tempo esgotado na etapa de {}."
+
+
+def get_projection_fields(fields: str | None, view: PokemonView) -> tuple:
+    """Fields requested by the client, empty for the whole document.
+
+    :param fields: comma separated top level fields
+    :param view: predefined projection
+    :return sorted field names
+    """
+    selected = set()
+    if fields:
+        selected = {field.strip() for field in fields.split(',')
+                    if field.strip()}
+        unknown = selected - POKEMON_FIELDS
+        if unknown:
+            raise Utils.api_exception(
+                message=invalid_fields.format(', '.join(sorted(unknown))),
+                status=400)
+    if view == PokemonView.summary:
+        selected.update(SUMMARY_FIELDS)
+    return tuple(sorted(selected))
+
+
+async def within(awaitable, budget_ms: float, stage: str):
+    """Await a pipeline stage, answering 504 past its latency budget.
+
+    :param awaitable: the stage
+    :param budget_ms: milliseconds the stage may take
+    :param stage: stage name for the error message
+    """
+    try:
+        return await asyncio.wait_for(awaitable, budget_ms / 1000)
+    except asyncio.TimeoutError:
+        raise Utils.api_exception(message=stage_timeout.format(stage),
+                                  status=504)
+
+
+def discard(task: asyncio.Task) -> None:
+    """Mark the error of a speculative lookup nobody waits for."""
+    if not task.cancelled():
+        task.exception()
+
+
+def reject_unknown_name(poke_name: str) -> None:
+    """Answer 404 with suggestions for names missing in the name index.
+
+    :param poke_name: the name of the pokémon
+    """
+    unknown = Pokemon.unknown_name(poke_name)
+    if unknown:
+        raise Utils.api_exception(message=unknown, status=404)
+
+
+@router.get("/search")
+async def search_pokemon_names(
+        q: str = Query(..., min_length=1),
+        limit: int = Query(10, ge=1, le=NAME_SEARCH_MAX_RESULTS),
+        auth_jwt: AuthJWT = Depends()):
+    """Autocomplete pokémon names.
+    :param q: beginning or approximate spelling of the name
+    :param limit: maximum number of names
+    :param auth_jwt: Auth check with jwt
+    :return names starting with q, then the most similar ones
+    """
+    auth_jwt.jwt_required()
+    names = PokemonNames.search(q, limit)
+    if names is None:
+        raise Utils.api_exception(message=no_name_index, status=503)
+    return {'query': q, 'names': names}
 
 
 @router.get("/chose_one_pokemon/{poke_name}")
 async def search_pokemon_by_name(poke_name: str,
+                                 request: Request,
+                                 fields: str | None = None,
+                                 view: PokemonView = PokemonView.full,
                                  auth_jwt: AuthJWT = Depends()):
     """Search pokémon by name.
     :param poke_name: the name of the pokémon
+    :param request: client request, for the accepted encodings
+    :param fields: comma separated top level fields to return
+    :param view: summary returns name, types, abilities and stats only
     :param auth_jwt: Auth check with jwt
     :return all data from selected pokémon database
     """
     auth_jwt.jwt_required()
-    poke_data = await Pokemon().get_pokemon(poke_name)
-    if not poke_data:
+    projection = get_projection_fields(fields, view)
+    reject_unknown_name(poke_name)
+    if projection:
+        poke_json = await Pokemon().get_pokemon_projection(
+            poke_name, projection)
+    else:
+        poke_json = await Pokemon().get_pokemon_json(poke_name)
+    if not poke_json:
         raise Utils.api_exception(
             message=no_pokemon.format(poke_name),
             status=404)
-    return poke_data
+    return RawJSONResponse.negotiated(request, poke_json)
+
+
+@router.post("/batch")
+async def search_pokemon_batch(batch: PokemonBatchSchema,
+                               auth_jwt: AuthJWT = Depends()):
+    """Search many pokémon by name or id in one request.
+    :param batch: names and optional projection
+    :param auth_jwt: Auth check with jwt
+    :return per pokémon status with its data or error detail
+    """
+    auth_jwt.jwt_required()
+    projection = get_projection_fields(batch.fields, batch.view)
+    results = await Pokemon().get_pokemon_batch(batch.names, projection)
+    return RawJSONResponse(orjson.dumps({'results': results}))
+
+
+@router.get("/type/{type_name}/stream")
+async def stream_pokemon_by_type(type_name: str,
+                                 fields: str | None = None,
+                                 view: PokemonView = PokemonView.full,
+                                 auth_jwt: AuthJWT = Depends()):
+    """Stream every pokémon of a type as NDJSON.
+    :param type_name: the name of the type
+    :param fields: comma separated top level fields to return
+    :param view: summary returns name, types, abilities and stats only
+    :param auth_jwt: Auth check with jwt
+    :return one json line per pokémon, in resolution order
+    """
+    auth_jwt.jwt_required()
+    projection = get_projection_fields(fields, view)
+    poke_api = Pokemon()
+    type_index = await poke_api.get_type_index(type_name)
+    if not type_index:
+        raise Utils.api_exception(
+            message=no_type.format(type_name),
+            status=404)
+
+    async def lines():
+        async for result in poke_api.stream_pokemon(
+                type_index.names, projection):
+            yield orjson.dumps(result, option=orjson.OPT_APPEND_NEWLINE)
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
 
 
 @router.get("/chose_pokemon_type/{poke_name}")
@@ -43,12 +182,13 @@ async def get_pokemon_type_by_name(poke_name: str,
     :return type of pokémon name
     """
     auth_jwt.jwt_required()
-    poke_data = await Pokemon().get_pokemon(poke_name)
-    if not poke_data:
+    reject_unknown_name(poke_name)
+    poke_record = await Pokemon().get_pokemon_record(poke_name)
+    if not poke_record:
         raise Utils.api_exception(
             message=no_pokemon.format(poke_name),
             status=404)
-    poke_type = await PokeRules(poke_data).get_types()
+    poke_type = await PokeRules(record=poke_record).get_types()
     if len(poke_type) == 0:
         raise Utils.api_exception(
             message="Pokemon {} sem tipo definido!"
@@ -59,81 +199,109 @@ async def get_pokemon_type_by_name(poke_name: str,
 
 @router.get("/chose_pokemon_by_type/{type_name}")
 async def get_pokemon_by_type_name(type_name: str,
+                                   request: Request,
                                    auth_jwt: AuthJWT = Depends()):
     """Get random by pokémon type by name.
     :param type_name: the name of the pokémon
+    :param request: client request, for the accepted encodings
     :param auth_jwt: Auth check with jwt
     :return random pokémon by type_name
     """
     auth_jwt.jwt_required()
     poke_api = Pokemon()
-    type_data = await poke_api.get_pokemon_by_type(type_name)
-    if not type_data:
+    type_index = await poke_api.get_type_index(type_name)
+    if not type_index:
         raise Utils.api_exception(
             message=no_pokemon.format(type_name),
             status=404)
     poke_name = await PokeRules(
-        poke_data=type_data, poke_type=True).get_random_pokemon_types()
-    if len(poke_name) == 0:
+        poke_type=True, index=type_index).get_random_pokemon_types()
+    if not poke_name:
         raise Utils.api_exception(
             message=no_type_pokemon.format(type_name),
             status=404)
-    poke_data = await poke_api.get_pokemon(poke_name)
-    return poke_data
+    poke_json = await poke_api.get_pokemon_json(poke_name)
+    if not poke_json:
+        raise Utils.api_exception(
+            message=no_pokemon.format(poke_name),
+            status=404)
+    return RawJSONResponse.negotiated(request, poke_json)
 
 
 @router.get("/larger_pokemon_name_by_type/{type_name}")
 async def get_larger_pokemon_name_by_type(type_name: str,
+                                          request: Request,
                                           auth_jwt: AuthJWT = Depends()):
     """Get larger pokémon name by type.
     :param type_name: the name of the pokémon
+    :param request: client request, for the accepted encodings
     :param auth_jwt: Auth check with jwt
     :return pokémon larger name in type
     """
     auth_jwt.jwt_required()
     poke_api = Pokemon()
-    type_data = await poke_api.get_pokemon_by_type(type_name)
-    if not type_data:
+    type_index = await poke_api.get_type_index(type_name)
+    if not type_index:
         raise Utils.api_exception(
             message=no_type.format(type_name),
             status=404)
     poke_name = await PokeRules(
-        poke_data=type_data, poke_type=True).get_larger_pokemon_name()
-    if len(poke_name) == 0:
+        poke_type=True, index=type_index).get_larger_pokemon_name()
+    if not poke_name:
         raise Utils.api_exception(
-            message="Sem pokémon para este typo {}!"
-            .format(type_name),
+            message=no_type_pokemon.format(type_name),
             status=404)
-    poke_data = await poke_api.get_pokemon(poke_name)
-    return poke_data
+    poke_json = await poke_api.get_pokemon_json(poke_name)
+    if not poke_json:
+        raise Utils.api_exception(
+            message=no_pokemon.format(poke_name),
+            status=404)
+    return RawJSONResponse.negotiated(request, poke_json)
 
 
 @router.post("/pokemon_by_type_temperature")
 async def get_pokemon_by_type_temperature(
         meteo: MeteoSchema,
+        request: Request,
         auth_jwt: AuthJWT = Depends()):
     """Prepare pokémon by type and temperature.
     :param meteo: Meteo schema
+    :param request: client request, for the accepted encodings
     :param auth_jwt: Auth check with jwt
     :return pokémon from type and city temperature
     """
     auth_jwt.jwt_required()
-    poke_api = Pokemon()
     meteo_api = OpenMeteoService()
-    location = Geocoding(meteo.city)
-    meteo_data = meteo_api.get_temperature(location.get_longitude(),
-                                           location.get_latitude())
-    type_name = meteo_api.get_pokemon_type_by_temperature(meteo_data)
-    type_data = await poke_api.get_pokemon_by_type(type_name)
-    if not type_data:
+    location = await within(Geocoding(meteo.city).search(),
+                            PIPELINE_GEOCODING_BUDGET_MS, 'geocodificação')
+    if not location.found:
         raise Utils.api_exception(
-            message=no_type.format(type_name),
-            status=404)
-    poke_name = await PokeRules(
-        poke_data=type_data, poke_type=True).get_pokemon_name_in_letter()
-    if len(poke_name) == 0:
-        raise Utils.api_exception(
-            message=no_type_pokemon.format(type_name),
+            message=no_city.format(meteo.city),
             status=404)
-    poke_data = await poke_api.get_pokemon(poke_name)
-    return poke_data
+
+    # Types missing in the hot set are looked up while the forecast is
+    # in flight, and the lookups of the other types are cancelled. Only
+    # the lookup answering the request is counted as a miss.
+    speculative = {}
+    if PIPELINE_SPECULATION_ENABLED:
+        for type_name in TEMPERATURE_TYPES:
+            if not TemperatureTypes.is_hot(type_name):
+                task = asyncio.ensure_future(
+                    TemperatureTypes.lookup(type_name))
+                task.add_done_callback(discard)
+                speculative[type_name] = task
+    try:
+        meteo_data = await within(
+            meteo_api.get_temperature(location.get_longitude(),
+                                      location.get_latitude()),
+            PIPELINE_METEO_BUDGET_MS, 'meteorologia')
+        type_name = meteo_api.get_pokemon_type_by_temperature(meteo_data)
+        chosen = speculative.pop(type_name, None)
+    finally:
+        for task in speculative.values():
+            task.cancel()
+    if chosen is not None:
+        TemperatureTypes.count('misses')
+    poke_json = await within(chosen or TemperatureTypes.choose(type_name),
+                             PIPELINE_POKEMON_BUDGET_MS, 'pokémon')
+    return RawJSONResponse.negotiated(request, poke_json)
@@ -0,0 +1,22 @@
+"""Pokémon schemas implementation."""
+
+from enum import Enum
+
+from pydantic import BaseModel, conlist
+
+from settings.infra import BATCH_MAX_ITEMS
+
+
+class PokemonView(str, Enum):
+    """Predefined projections of the pokémon document."""
+
+    full = 'full'
+    summary = 'summary'
+
+
+class PokemonBatchSchema(BaseModel):
+    """Pokémon batch lookup schema."""
+
+    names: conlist(str, min_items=1, max_items=BATCH_MAX_ITEMS)
+    fields: str | None = None
+    view: PokemonView = PokemonView.full
@@ -0,0 +1,443 @@
+"""Two-tier cache (in-process LRU + Redis) for upstream responses."""
+
+import asyncio
+import json
+import math
+import random
+import sys
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable
+
+import orjson
+from aioredis import RedisError
+from fastapi import HTTPException
+
+from database.redis import redis_async
+from services.single_flight import SingleFlight
+from settings.infra import (CACHE_STALE_SECONDS, CACHE_SWR_SECONDS,
+                            CACHE_XFETCH_BETA, NEGATIVE_CACHE_MAX_ENTRIES)
+from settings.sys_logger import SysLog, TypeLog
+
+
+def size_of(value) -> int:
+    """Approximate bytes held by a value derived from a document.
+
+    Values holding more than their own object report it in nbytes.
+    """
+    nbytes = getattr(value, 'nbytes', None)
+    return sys.getsizeof(value) if nbytes is None else nbytes
+
+
+class CacheEntry:
+    """Cached upstream document."""
+
+    __slots__ = ('body', 'etag', 'stored_at', 'ttl', 'delta', 'derived',
+                 'derived_bytes', 'lru')
+
+    def __init__(self, body: bytes, etag: str = None,
+                 stored_at: float = None, ttl: int = 0,
+                 delta: float = 0.0):
+        """Entry initialization.
+
+        :param body: raw json bytes of the document
+        :param etag: upstream etag, used for revalidation
+        :param stored_at: epoch when the entry was fetched
+        :param ttl: seconds the entry stays fresh
+        :param delta: seconds the upstream fetch took
+        """
+        self.body = body
+        self.etag = etag
+        self.stored_at = time.time() if stored_at is None else stored_at
+        self.ttl = ttl
+        self.delta = delta
+        self.derived = {}
+        self.derived_bytes = 0
+        self.lru = None
+
+    @property
+    def size(self) -> int:
+        """Bytes accounted in the LRU budget, derived values included."""
+        return len(self.body) + self.derived_bytes
+
+    @property
+    def expired(self) -> bool:
+        """True when the entry must be revalidated."""
+        return time.time() >= self.stored_at + self.ttl
+
+    @property
+    def servable_stale(self) -> bool:
+        """True while an expired entry may be served during its refresh."""
+        return time.time() < self.stored_at + self.ttl + CACHE_SWR_SECONDS
+
+    def early_refresh(self) -> bool:
+        """Probabilistic early expiration (XFetch).
+
+        The closer to expiry and the costlier the fetch, the more likely
+        a request triggers the refresh, spreading refreshes over time
+        instead of every request missing at the same moment.
+        """
+        if not self.delta:
+            return False
+        gap = -self.delta * CACHE_XFETCH_BETA * math.log(
+            1.0 - random.random())
+        return time.time() + gap >= self.stored_at + self.ttl
+
+    @property
+    def data(self):
+        """Parsed document, decoded on each access.
+
+        The decoded document is several times the body, so it is not
+        kept; what is needed on every request is derived instead.
+        """
+        return orjson.loads(self.body)
+
+    def derive(self, name: str, factory: Callable[[], Any]):
+        """Value computed once from the document and kept with it.
+
+        :param name: identity of the derived value
+        :param factory: builds the value on the first access
+        """
+        if name not in self.derived:
+            value = factory()
+            self.derived[name] = value
+            self.grow(size_of(value))
+        return self.derived[name]
+
+    def grow(self, nbytes: int) -> None:
+        """Account bytes added to the entry after it was stored.
+
+        :param nbytes: bytes held by a new derived value
+        """
+        self.derived_bytes += nbytes
+        if self.lru is not None:
+            self.lru.grown(nbytes)
+
+    def revalidated(self, ttl: int) -> 'CacheEntry':
+        """Copy of the entry fresh again after a 304 from upstream."""
+        entry = CacheEntry(self.body, self.etag, ttl=ttl, delta=self.delta)
+        entry.derived = self.derived
+        entry.derived_bytes = self.derived_bytes
+        for value in self.derived.values():
+            # Compressed forms built from now on grow the new entry
+            if getattr(value, 'owner', None) is self:
+                value.owner = entry
+        return entry
+
+    def dump(self) -> dict:
+        """Redis hash representation."""
+        return {'body': self.body, 'etag': self.etag or '',
+                'stored_at': self.stored_at, 'ttl': self.ttl,
+                'delta': self.delta}
+
+    @staticmethod
+    def encode(entry: 'CacheEntry | None') -> bytes:
+        """Compact bytes form, a json header line followed by the body."""
+        if entry is None:
+            return b''
+        header = json.dumps(
+            [entry.etag, entry.stored_at, entry.ttl, entry.delta])
+        return header.encode() + b'\n' + entry.body
+
+    @classmethod
+    def decode(cls, raw: bytes) -> 'CacheEntry | None':
+        """Build the entry from its compact bytes form."""
+        if not raw:
+            return None
+        header, body = raw.split(b'\n', 1)
+        return cls(body, *json.loads(header))
+
+    @classmethod
+    def load(cls, mapping: dict) -> 'CacheEntry':
+        """Build the entry from the redis hash."""
+        return cls(mapping[b'body'],
+                   mapping[b'etag'].decode() or None,
+                   float(mapping[b'stored_at']),
+                   int(mapping[b'ttl']),
+                   float(mapping.get(b'delta', 0)))
+
+
+class LruCache:
+    """Per-worker LRU bounded by the total bytes of the entries.
+
+    Values derived from an entry after it was stored are added to the
+    total as they are built, see CacheEntry.grow.
+    """
+
+    def __init__(self, max_bytes: int):
+        """LRU initialization.
+
+        :param max_bytes: budget of bytes kept in memory
+        """
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.entries = OrderedDict()
+
+    def get(self, key: str) -> CacheEntry | None:
+        """Get the entry, marking it as recently used."""
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+        return entry
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        """Store the entry, evicting the least recently used ones."""
+        self.pop(key)
+        if entry.size > self.max_bytes:
+            return
+        self.entries[key] = entry
+        entry.lru = self
+        self.total_bytes += entry.size
+        self.evict()
+
+    def grown(self, nbytes: int) -> None:
+        """An entry in the LRU grew by nbytes."""
+        self.total_bytes += nbytes
+        self.evict()
+
+    def evict(self) -> None:
+        """Drop the least recently used entries while over budget."""
+        while self.total_bytes > self.max_bytes and self.entries:
+            _, evicted = self.entries.popitem(last=False)
+            evicted.lru = None
+            self.total_bytes -= evicted.size
+
+    def pop(self, key: str) -> None:
+        """Remove the entry if present."""
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            entry.lru = None
+            self.total_bytes -= entry.size
+
+
+class NegativeCache:
+    """Per-worker record of names the upstream answered as missing.
+
+    Bounded to NEGATIVE_CACHE_MAX_ENTRIES keys, the oldest dropped
+    first, so random names from scrapers can not grow it without limit.
+    """
+
+    instances: dict = {}
+
+    def __init__(self, name: str, max_entries: int = None):
+        """Negative cache initialization.
+
+        :param name: stats name
+        :param max_entries: keys kept, NEGATIVE_CACHE_MAX_ENTRIES default
+        """
+        self.max_entries = max_entries or NEGATIVE_CACHE_MAX_ENTRIES
+        self.entries = OrderedDict()
+        self.stats = {'hits': 0, 'stored': 0, 'expired': 0, 'evicted': 0}
+        NegativeCache.instances[name] = self
+
+    def __contains__(self, key: str) -> bool:
+        """True while the key is known to be missing upstream."""
+        expires_at = self.entries.get(key)
+        if expires_at is None:
+            return False
+        if time.monotonic() >= expires_at:
+            del self.entries[key]
+            self.stats['expired'] += 1
+            return False
+        self.stats['hits'] += 1
+        return True
+
+    def add(self, key: str, ttl: int) -> None:
+        """Remember the key as missing for ttl seconds."""
+        if ttl <= 0:
+            return
+        self.entries.pop(key, None)
+        self.entries[key] = time.monotonic() + ttl
+        self.stats['stored'] += 1
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.stats['evicted'] += 1
+
+    def discard(self, key: str) -> None:
+        """Forget the key, it exists now."""
+        self.entries.pop(key, None)
+
+    @classmethod
+    def report(cls) -> dict:
+        """Counters and size of every negative cache."""
+        return {name: {**cache.stats, 'entries': len(cache.entries),
+                       'max_entries': cache.max_entries}
+                for name, cache in cls.instances.items()}
+
+
+class TieredCache:
+    """Read-through cache with a local LRU in front of Redis."""
+
+    instances: dict = {}
+
+    def __init__(self, namespace: str, max_bytes: int):
+        """Cache initialization.
+
+        :param namespace: prefix of the keys in redis and stats name
+        :param max_bytes: budget of the in-process LRU
+        """
+        self.namespace = namespace
+        self.local = LruCache(max_bytes)
+        self.stats = {'l1': {'hits': 0, 'misses': 0},
+                      'l2': {'hits': 0, 'misses': 0},
+                      'stale': 0, 'stale_on_error': 0, 'refreshes': 0}
+        self.refreshing = {}
+        self.missing = NegativeCache(namespace)
+        TieredCache.instances[namespace] = self
+
+    def redis_key(self, key: str) -> str:
+        """Key of the entry in redis."""
+        return f"pokeservice:{self.namespace}:{key}"
+
+    async def set(self, key: str, entry: CacheEntry) -> None:
+        """Store the entry in both tiers.
+
+        :param key: cache key
+        :param entry: entry to store
+        """
+        self.local.set(key, entry)
+        self.missing.discard(key)
+        try:
+            async with redis_async.pipeline(transaction=False) as pipe:
+                pipe.hset(self.redis_key(key), mapping=entry.dump())
+                pipe.expire(self.redis_key(key),
+                            entry.ttl + CACHE_STALE_SECONDS)
+                await pipe.execute()
+        except (RedisError, OSError) as err:
+            self.log_redis_error(err)
+
+    async def get_shared(self, key: str) -> CacheEntry | None:
+        """Get the entry from redis."""
+        try:
+            mapping = await redis_async.hgetall(self.redis_key(key))
+        except (RedisError, OSError) as err:
+            self.log_redis_error(err)
+            return None
+        return CacheEntry.load(mapping) if mapping else None
+
+    async def get_or_load(
+            self, key: str,
+            loader: Callable[[CacheEntry | None],
+                             Awaitable[CacheEntry | None]],
+            flight: SingleFlight = None,
+            missing_ttl: int = 0) -> CacheEntry | None:
+        """Read-through access with stale-while-revalidate.
+
+        Fresh entries may be refreshed early in background (XFetch) and
+        recently expired ones are served while refreshed in background,
+        so only entries far past their expiry block the request.
+
+        :param key: cache key
+        :param loader: called with the expired entry (or None) on a miss,
+            returns the new entry or None when the document does not exist
+        :param flight: coalesces concurrent misses of the same key
+        :param missing_ttl: seconds a document that does not exist is
+            answered as None without calling the loader again
+        """
+        entry = self.local.get(key)
+        if entry is not None and not entry.expired:
+            self.stats['l1']['hits'] += 1
+            if entry.early_refresh():
+                self.refresh_later(key, loader, flight)
+            return entry
+        self.stats['l1']['misses'] += 1
+
+        if entry is not None and entry.servable_stale:
+            self.stats['stale'] += 1
+            self.refresh_later(key, loader, flight)
+            return entry
+
+        if entry is None and key in self.missing:
+            return None
+        loaded = await self.coalesce(key, loader, flight, entry)
+        if loaded is None and entry is None:
+            self.missing.add(key, missing_ttl)
+        return loaded
+
+    async def coalesce(self, key: str, loader, flight: SingleFlight,
+                       entry: CacheEntry | None, background=False):
+        """Run the load through the single-flight, when given."""
+        if flight is None:
+            return await self.load(key, loader, entry, background)
+        return await flight.do(
+            key, lambda: self.load(key, loader, entry, background))
+
+    async def load(self, key: str, loader, entry: CacheEntry | None,
+                   background: bool = False):
+        """Look up the shared tier, calling the loader on a miss.
+
+        :param key: cache key
+        :param loader: see get_or_load
+        :param entry: expired local entry, if any
+        :param background: True when refreshing, stale entries are not
+            an acceptable answer
+        """
+        shared = await self.get_shared(key)
+        if background and shared is not None and entry is not None \
+                and shared.stored_at <= entry.stored_at:
+            # Refreshing: the shared copy is not newer than the local one
+            shared = None
+        if shared is not None and not shared.expired:
+            self.stats['l2']['hits'] += 1
+            self.local.set(key, shared)
+            return shared
+        self.stats['l2']['misses'] += 1
+
+        if entry is None or (shared and shared.stored_at > entry.stored_at):
+            entry = shared
+        if not background and entry is not None and entry.servable_stale:
+            self.stats['stale'] += 1
+            self.local.set(key, entry)
+            self.refresh_later(key, loader, None)
+            return entry
+
+        started = time.monotonic()
+        try:
+            loaded = await loader(entry)
+        except HTTPException as err:
+            if entry is None:
+                raise
+            # Upstream failing or circuit open: the stale copy will do
+            self.stats['stale_on_error'] += 1
+            msg = f"Servindo {key} expirado, erro: {err.detail}"
+            SysLog(__name__).show_log(TypeLog.warning.value, msg)
+            self.local.set(key, entry)
+            return entry
+        if loaded is not None:
+            loaded.delta = time.monotonic() - started
+            await self.set(key, loaded)
+        return loaded
+
+    def refresh_later(self, key: str, loader, flight: SingleFlight) -> None:
+        """Refresh the entry in background, once per key."""
+        if key in self.refreshing:
+            return
+        self.stats['refreshes'] += 1
+        entry = self.local.get(key)
+        task = asyncio.ensure_future(
+            self.coalesce(key, loader, flight, entry, background=True))
+        self.refreshing[key] = task
+        task.add_done_callback(lambda done: self.refreshed(key, done))
+
+    def refreshed(self, key: str, task: asyncio.Future) -> None:
+        """Forget the background refresh, logging its failure."""
+        self.refreshing.pop(key, None)
+        if not task.cancelled() and task.exception() is not None:
+            msg = f"Falha ao renovar o cache {key}: {task.exception()!r}"
+            SysLog(__name__).show_log(TypeLog.warning.value, msg)
+
+    @staticmethod
+    def log_redis_error(err):
+        """Redis is optional for the cache, only log the failure."""
+        msg = f"Cache compartilhado indisponível: {err!r}"
+        SysLog(__name__).show_log(TypeLog.warning.value, msg)
+
+    @classmethod
+    def report(cls) -> dict:
+        """Hit and miss counters of every cache by tier."""
+        return {
+            name: {**cache.stats,
+                   'l1_entries': len(cache.local.entries),
+                   'l1_bytes': cache.local.total_bytes,
+                   'l1_max_bytes': cache.local.max_bytes}
+            for name, cache in cls.instances.items()}
@@ -0,0 +1,156 @@
+"""On-disk snapshot of the in-process caches, for warm starts."""
+
+import asyncio
+import mmap
+import os
+import struct
+import time
+import zlib
+from pathlib import Path
+
+from services.cache import CacheEntry, TieredCache
+from settings.infra import CACHE_SNAPSHOT_DIR, CACHE_STALE_SECONDS
+from settings.sys_logger import SysLog, TypeLog
+
+# Layout, little endian:
+#   header: magic, version, record count, data bytes, created at, crc32
+#   record: key size, entry size, crc32 of key + entry, key, entry
+# The entry is CacheEntry.encode, records go from least to most
+# recently used so loading them in order rebuilds the LRU order.
+MAGIC = b'PKSNAP'
+VERSION = 1
+HEADER = struct.Struct('<6sHIQd')
+HEADER_CRC = struct.Struct('<I')
+RECORD = struct.Struct('<HII')
+
+
+class SnapshotError(Exception):
+    """Snapshot file unusable: foreign, other version or corrupted."""
+
+
+class CacheSnapshot:
+    """Dump and load the LRU tier of the TieredCache instances.
+
+    Files are written to a temporary name and renamed, so a crash while
+    writing never leaves a truncated snapshot. Loading maps the file in
+    memory and checks the header and every record checksum before use.
+    """
+
+    @staticmethod
+    def path(namespace: str) -> Path:
+        """Snapshot file of a cache namespace."""
+        return Path(CACHE_SNAPSHOT_DIR) / f'{namespace}.snap'
+
+    @staticmethod
+    def save(path: Path, entries: list) -> int:
+        """Write the cache entries to the snapshot file.
+
+        :param path: destination file
+        :param entries: (key, entry) pairs, least recently used first
+        :returns: number of entries written
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        records = []
+        for key, entry in entries:
+            key_bytes = key.encode()
+            raw = CacheEntry.encode(entry)
+            crc = zlib.crc32(raw, zlib.crc32(key_bytes))
+            records.append(RECORD.pack(len(key_bytes), len(raw), crc)
+                           + key_bytes + raw)
+        data_bytes = sum(len(record) for record in records)
+        header = HEADER.pack(MAGIC, VERSION, len(records), data_bytes,
+                             time.time())
+
+        temp = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+        with open(temp, 'wb') as file:
+            file.write(header + HEADER_CRC.pack(zlib.crc32(header)))
+            file.writelines(records)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp, path)
+        return len(records)
+
+    @classmethod
+    def load(cls, path: Path) -> list:
+        """Read the cache entries of the snapshot file.
+
+        Entries past their stale window are skipped, the others keep
+        their age so expired ones are revalidated as usual.
+
+        :param path: source file
+        :returns: (key, entry) pairs, least recently used first
+        """
+        with open(path, 'rb') as file:
+            if os.fstat(file.fileno()).st_size \
+                    < HEADER.size + HEADER_CRC.size:
+                raise SnapshotError(f'{path}: arquivo truncado')
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mem:
+                return cls.read(mem, path)
+
+    @staticmethod
+    def read(mem: mmap.mmap, path: Path) -> list:
+        """Validate the mapped snapshot and load its records."""
+        magic, version, count, data_bytes, _ = HEADER.unpack_from(mem)
+        if magic != MAGIC:
+            raise SnapshotError(f'{path}: não é um snapshot de cache')
+        if version != VERSION:
+            raise SnapshotError(f'{path}: versão {version} não suportada')
+        (header_crc,) = HEADER_CRC.unpack_from(mem, HEADER.size)
+        if header_crc != zlib.crc32(mem[:HEADER.size]):
+            raise SnapshotError(f'{path}: cabeçalho corrompido')
+        offset = HEADER.size + HEADER_CRC.size
+        if len(mem) != offset + data_bytes:
+            raise SnapshotError(f'{path}: tamanho inesperado')
+
+        now = time.time()
+        entries = []
+        for _ in range(count):
+            key_size, raw_size, crc = RECORD.unpack_from(mem, offset)
+            offset += RECORD.size
+            key = mem[offset:offset + key_size]
+            raw = mem[offset + key_size:offset + key_size + raw_size]
+            offset += key_size + raw_size
+            if len(raw) != raw_size \
+                    or zlib.crc32(raw, zlib.crc32(key)) != crc:
+                raise SnapshotError(f'{path}: registro corrompido')
+            entry = CacheEntry.decode(raw)
+            if entry.stored_at + entry.ttl + CACHE_STALE_SECONDS < now:
+                continue
+            entries.append((key.decode(), entry))
+        return entries
+
+    @classmethod
+    async def save_all(cls) -> dict:
+        """Snapshot every cache, called at shutdown or on demand."""
+        saved = {}
+        for name, cache in TieredCache.instances.items():
+            try:
+                saved[name] = await asyncio.to_thread(
+                    cls.save, cls.path(name),
+                    list(cache.local.entries.items()))
+            except OSError as err:
+                cls.log_error(name, err)
+        return saved
+
+    @classmethod
+    async def load_all(cls) -> dict:
+        """Warm every cache from its snapshot, called at startup."""
+        loaded = {}
+        for name, cache in TieredCache.instances.items():
+            if not cls.path(name).is_file():
+                continue
+            try:
+                entries = await asyncio.to_thread(cls.load, cls.path(name))
+            except (SnapshotError, OSError, ValueError, struct.error) as err:
+                cls.log_error(name, err)
+                continue
+            for key, entry in entries:
+                cache.local.set(key, entry)
+            loaded[name] = len(entries)
+        return loaded
+
+    @staticmethod
+    def log_error(name: str, err: Exception) -> None:
+        """The snapshot is only an optimization, log the failure."""
+        msg = f"Snapshot do cache {name} ignorado: {err!r}"
+        SysLog(__name__).show_log(TypeLog.warning.value, msg)
@@ -1,9 +1,42 @@
 """Access Geocoding API."""
-import requests
+import asyncio
+import os
+import struct
+from collections import OrderedDict
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from database.postgres import SessionLocal
+from domain.gazetteer import (Gazetteer, GazetteerError, SAMPLE_PATH,
+                              build_gazetteer, normalize_name)
+from models.city import CityDTO
+from services.cache import NegativeCache
+from services.http_client import HttpClient
+from services.single_flight import SingleFlight
+from settings.infra import (GEOCODING_URL, NEGATIVE_TTL_CITY,
+                            GEOCODING_LRU_SIZE, GEOCODING_STORE_ENABLED,
+                            GAZETTEER_ENABLED, GAZETTEER_PATH)
+from settings.sys_logger import SysLog, TypeLog
+
+geocoding_flight = SingleFlight('geocoding')
+geocoding_missing = NegativeCache('geocoding')
+
+# Fields of the geocoding result kept for a city
+CITY_FIELDS = ('name', 'latitude', 'longitude', 'country_code', 'population')
 
 
 class Geocoding:
-    """Class for accessing geolocation."""
+    """Class for accessing geolocation.
+
+    Coordinates of a city never change, so a city is resolved through
+    the offline gazetteer, a per-worker LRU, then the geocoded_city
+    table, and only cities never seen before reach the geocoding API.
+    """
+
+    gazetteer: Gazetteer = None
+    cities: OrderedDict = OrderedDict()
+    stats: dict = {'gazetteer': 0, 'lru': 0, 'store': 0, 'api': 0,
+                   'missing': 0}
 
     def __init__(self, city: str):
         """Initialize the geocoding class.
@@ -11,15 +44,145 @@ class Geocoding:
         :param city: The city to geolocation, defaults to 'Aracaju' in scheme
         """
         self.city = city
-        self.url = 'https://geocoding-api.open-meteo.com/v1/search?name='
-        self.result_city = requests.get(self.url + self.city)
+        self.key = self.normalize(city)
+        self.url = GEOCODING_URL
+        self.result_city = None
+
+    @classmethod
+    async def init(cls):
+        """Map the offline gazetteer, called in the startup event.
+
+        A missing index is built from the bundled sample first, as a
+        volume mounted over the code hides the one built in the image.
+        """
+        if not GAZETTEER_ENABLED or cls.gazetteer is not None:
+            return
+        try:
+            if not os.path.exists(GAZETTEER_PATH):
+                await asyncio.to_thread(build_gazetteer, SAMPLE_PATH,
+                                        GAZETTEER_PATH)
+            cls.gazetteer = Gazetteer(GAZETTEER_PATH)
+        except (GazetteerError, OSError, struct.error) as err:
+            msg = f"Índice offline de cidades indisponível: {err!r}"
+            SysLog(__name__).show_log(TypeLog.warning.value, msg)
+
+    @classmethod
+    async def close(cls):
+        """Unmap the offline gazetteer, called in the shutdown event."""
+        if cls.gazetteer is not None:
+            cls.gazetteer.close()
+        cls.gazetteer = None
+
+    @staticmethod
+    def normalize(city: str) -> str:
+        """Lookup key of a city: lowercase, no accents, single spaces.
+
+        :param city: name typed by the client
+        """
+        return normalize_name(city)
+
+    async def search(self):
+        """Search the city coordinates.
+
+        Cities without results are remembered for NEGATIVE_TTL_CITY
+        seconds and not searched again meanwhile.
+        """
+        if self.gazetteer is not None:
+            self.result_city = self.gazetteer.lookup(self.city)
+            if self.result_city is not None:
+                self.stats['gazetteer'] += 1
+                return self
+        if self.key in self.cities:
+            self.cities.move_to_end(self.key)
+            self.stats['lru'] += 1
+            self.result_city = self.cities[self.key]
+            return self
+        if self.key in geocoding_missing:
+            self.stats['missing'] += 1
+            return self
+
+        self.result_city = await geocoding_flight.do(
+            self.key, self.resolve_city)
+        if self.found:
+            self.remember(self.key, self.result_city)
+        else:
+            geocoding_missing.add(self.key, NEGATIVE_TTL_CITY)
+        return self
+
+    @property
+    def found(self) -> bool:
+        """True when the city was found."""
+        return self.result_city is not None
+
+    @classmethod
+    def remember(cls, key: str, city: dict) -> None:
+        """Keep the city in the LRU of the worker."""
+        cls.cities[key] = city
+        cls.cities.move_to_end(key)
+        while len(cls.cities) > GEOCODING_LRU_SIZE:
+            cls.cities.popitem(last=False)
+
+    async def resolve_city(self) -> dict | None:
+        """Get the city from the store, falling back to the API."""
+        city = await self.get_stored()
+        if city is not None:
+            self.stats['store'] += 1
+            return city
+        city = await self.fetch_city()
+        if city is not None:
+            self.stats['api'] += 1
+            await self.store(city)
+        return city
+
+    async def fetch_city(self) -> dict | None:
+        """Request the city coordinates."""
+        response = await HttpClient.get(self.url, params={'name': self.city,
+                                                          'count': 1})
+        results = response.json().get('results')
+        if not results:
+            return None
+        city = {field: results[0].get(field) for field in CITY_FIELDS}
+        city['name'] = city['name'] or self.city
+        return city
+
+    async def get_stored(self) -> dict | None:
+        """Get the city from the geocoded_city table."""
+        if not GEOCODING_STORE_ENABLED:
+            return None
+        try:
+            async with SessionLocal() as session:
+                return await CityDTO(session).get_by_key(self.key)
+        except (SQLAlchemyError, OSError) as err:
+            self.log_store_error(err)
+            return None
+
+    async def store(self, city: dict) -> None:
+        """Keep the resolved city in the geocoded_city table."""
+        if not GEOCODING_STORE_ENABLED:
+            return
+        try:
+            async with SessionLocal() as session:
+                await CityDTO(session).save(self.key, city)
+        except (SQLAlchemyError, OSError) as err:
+            self.log_store_error(err)
+
+    @staticmethod
+    def log_store_error(err):
+        """The store is only an optimization, log the failure."""
+        msg = f"Cadastro de cidades indisponível: {err!r}"
+        SysLog(__name__).show_log(TypeLog.warning.value, msg)
+
+    @classmethod
+    def report(cls) -> dict:
+        """Where the cities were resolved and size of the LRU."""
+        return {**cls.stats, 'lru_entries': len(cls.cities),
+                'lru_max_entries': GEOCODING_LRU_SIZE,
+                'gazetteer_entries': len(cls.gazetteer or ())}
 
     def get_longitude(self):
         """Get the longitude."""
-        location = self.result_city.json()
-        return str(location['results'][0]['longitude'])
+        return str(self.result_city['longitude'])
 
     def get_latitude(self):
         """Get the latitude."""
-        location = self.result_city.json()
-        return str(location['results'][0]['latitude'])
+        return str(self.result_city['latitude'])
@@ -0,0 +1,217 @@
+"""Shared asynchronous HTTP client for the upstream APIs."""
+
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+import httpx
+from fastapi import status
+
+from services.resilience import Upstream
+from settings.infra import (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT,
+                            HTTP_MAX_CONNECTIONS, HTTP_MAX_KEEPALIVE,
+                            HTTP_KEEPALIVE_EXPIRY, HTTP_MAX_PER_HOST,
+                            UPSTREAM_DEADLINE_SECONDS, UPSTREAM_MAX_RETRIES,
+                            UPSTREAM_RETRY_BACKOFF_MS, UPSTREAM_HEDGE_ENABLED)
+from settings.sys_logger import SysLog, TypeLog
+from utils.utils import Utils
+
+upstream_timeout = "Serviço externo {} não respondeu a tempo."
+upstream_error = "Falha ao acessar o serviço externo {}."
+upstream_open = "Serviço externo {} indisponível, tente novamente mais tarde."
+
+# Upstream answers worth retrying, the others are final
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class HttpClient:
+    """App-lifetime pooled client shared by every upstream service.
+
+    Connections are kept alive between requests and each upstream host
+    has its own concurrency limit, so a slow host can not take all the
+    connections of the pool.
+
+    Each host also has a circuit breaker, a retry budget and a latency
+    window used to hedge slow requests; every call has an overall
+    deadline covering retries and hedges.
+    """
+
+    client: httpx.AsyncClient = None
+    host_limits: dict = {}
+    upstreams: dict = {}
+
+    @classmethod
+    async def init(cls):
+        """Create the pooled client, called in the startup event."""
+        if cls.client is not None:
+            return
+        cls.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(HTTP_READ_TIMEOUT,
+                                  connect=HTTP_CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY),
+            follow_redirects=True)
+
+    @classmethod
+    async def close(cls):
+        """Close the pooled client, called in the shutdown event."""
+        if cls.client is not None:
+            await cls.client.aclose()
+        cls.client = None
+        cls.host_limits = {}
+
+    @classmethod
+    def host_limit(cls, host: str) -> asyncio.Semaphore:
+        """Get the concurrency limit of the upstream host.
+
+        :param host: upstream host name
+        """
+        if host not in cls.host_limits:
+            cls.host_limits[host] = asyncio.Semaphore(HTTP_MAX_PER_HOST)
+        return cls.host_limits[host]
+
+    @classmethod
+    def upstream(cls, host: str) -> Upstream:
+        """Get the resilience state of the upstream host.
+
+        :param host: upstream host name
+        """
+        if host not in cls.upstreams:
+            cls.upstreams[host] = Upstream(host)
+        return cls.upstreams[host]
+
+    @classmethod
+    async def get(cls, url: str, params: dict = None,
+                  headers: dict = None) -> httpx.Response:
+        """GET request through the pooled client.
+
+        :param url: full url of the upstream resource
+        :param params: query string parameters
+        :param headers: extra request headers
+        :returns: upstream response
+        """
+        if cls.client is None:
+            await cls.init()
+        host = urlsplit(url).netloc
+        upstream = cls.upstream(host)
+        upstream.stats['requests'] += 1
+        if not upstream.breaker.allow():
+            upstream.stats['rejected'] += 1
+            raise Utils.api_exception(
+                message=upstream_open.format(host),
+                status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        upstream.budget.deposit()
+
+        try:
+            response = await asyncio.wait_for(
+                cls.get_with_retries(upstream, url, params, headers),
+                UPSTREAM_DEADLINE_SECONDS)
+        except (httpx.TimeoutException, asyncio.TimeoutError) as err:
+            cls.record_failure(upstream, err)
+            raise Utils.api_exception(
+                message=upstream_timeout.format(host),
+                status=status.HTTP_504_GATEWAY_TIMEOUT)
+        except httpx.HTTPError as err:
+            cls.record_failure(upstream, err)
+            raise Utils.api_exception(
+                message=upstream_error.format(host),
+                status=status.HTTP_502_BAD_GATEWAY)
+        except asyncio.CancelledError:
+            upstream.breaker.probing = False
+            raise
+
+        if response.status_code in RETRY_STATUS:
+            cls.record_failure(upstream, response.status_code)
+            raise Utils.api_exception(
+                message=upstream_error.format(host),
+                status=status.HTTP_502_BAD_GATEWAY)
+        upstream.breaker.record_success()
+        return response
+
+    @classmethod
+    async def get_with_retries(cls, upstream: Upstream, url: str,
+                               params: dict, headers: dict):
+        """Send the request, retrying while the budget allows.
+
+        :returns: the last upstream response
+        """
+        attempt = 0
+        while True:
+            try:
+                response = await cls.get_hedged(upstream, url,
+                                                params, headers)
+                if response.status_code not in RETRY_STATUS:
+                    return response
+                failure = None
+            except httpx.TransportError as err:
+                response, failure = None, err
+            attempt += 1
+            if attempt > UPSTREAM_MAX_RETRIES \
+                    or not upstream.budget.withdraw():
+                if failure is not None:
+                    raise failure
+                return response
+            upstream.stats['retries'] += 1
+            await asyncio.sleep(
+                UPSTREAM_RETRY_BACKOFF_MS / 1000 * 2 ** (attempt - 1))
+
+    @classmethod
+    async def get_hedged(cls, upstream: Upstream, url: str,
+                         params: dict, headers: dict) -> httpx.Response:
+        """Send the request, plus a second one if the first is slower
+        than the p95 latency of the host. The first answer wins.
+        """
+        first = asyncio.ensure_future(
+            cls.send(upstream, url, params, headers))
+        delay = upstream.latency.percentile(0.95)
+        if not UPSTREAM_HEDGE_ENABLED or delay is None:
+            return await first
+
+        pending = {first}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=delay)
+            if done:
+                return first.result()
+            upstream.stats['hedges'] += 1
+            pending.add(asyncio.ensure_future(
+                cls.send(upstream, url, params, headers)))
+            while True:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                if not pending:
+                    return done.pop().result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    @classmethod
+    async def send(cls, upstream: Upstream, url: str, params: dict,
+                   headers: dict) -> httpx.Response:
+        """One request under the host concurrency limit."""
+        async with cls.host_limit(upstream.host):
+            started = time.monotonic()
+            response = await cls.client.get(url, params=params,
+                                            headers=headers)
+        if response.status_code not in RETRY_STATUS:
+            upstream.latency.add(time.monotonic() - started)
+        return response
+
+    @staticmethod
+    def record_failure(upstream: Upstream, err) -> None:
+        """Count the failed call in the circuit breaker and log it."""
+        upstream.stats['failures'] += 1
+        upstream.breaker.record_failure()
+        msg = (f"Erro no serviço externo {upstream.host}: {err!r} "
+               f"circuito={upstream.breaker.state}")
+        SysLog(__name__).show_log(TypeLog.warning.value, msg)
+
+    @classmethod
+    def report(cls) -> dict:
+        """Resilience state of every upstream host."""
+        return {host: upstream.report()
+                for host, upstream in cls.upstreams.items()}
@@ -1,5 +1,277 @@
 """Access Open-Meteo API."""
-import requests
+import asyncio
+import time
+from collections import OrderedDict
+
+from fastapi import HTTPException, status
+
+from domain import geohash
+from domain.forecast import ForecastTimeline
+from services.http_client import HttpClient
+from services.meteo_flatbuffers import hourly_temperatures
+from services.single_flight import SingleFlight
+from settings.infra import (OPEN_METEO_URL, METEO_GEOHASH_PRECISION,
+                            METEO_CELL_CACHE_SIZE, METEO_BATCH_WINDOW_MS,
+                            METEO_BATCH_MAX_LOCATIONS, METEO_FORECAST_HOURS,
+                            METEO_FORECAST_REFRESH_SECONDS,
+                            METEO_FLATBUFFERS_ENABLED)
+from settings.sys_logger import SysLog, TypeLog
+from utils.utils import Utils
+
+invalid_answer = "Resposta inválida do serviço de meteorologia."
+
+# Json only for a while after a FlatBuffers answer could not be read
+FLATBUFFERS_RETRY_SECONDS = 600
+
+# Every type get_pokemon_type_by_temperature may answer
+TEMPERATURE_TYPES = ('fire', 'rock', 'normal', 'water', 'ice')
+
+meteo_flight = SingleFlight('meteo', encode=ForecastTimeline.encode,
+                            decode=ForecastTimeline.decode)
+
+
+class ForecastBatch:
+    """Cells fetched together in one upstream request."""
+
+    __slots__ = ('cells', 'done')
+
+    def __init__(self, cells: list = None):
+        """Batch initialization.
+
+        :param cells: geohash cells, more may be added until it is sent
+        """
+        self.cells = cells or []
+        self.done = asyncio.get_running_loop().create_future()
+        self.done.add_done_callback(self.forget)
+
+    @staticmethod
+    def forget(future: asyncio.Future) -> None:
+        """Mark the exception as retrieved, a refresh has no caller."""
+        if not future.cancelled():
+            future.exception()
+
+
+class TemperatureGrid:
+    """Hourly forecast timelines kept per geohash cell.
+
+    Coordinates in the same cell share the timeline of the next
+    METEO_FORECAST_HOURS, and the current temperature is interpolated
+    from it. Cells missing in the grid are collected for
+    METEO_BATCH_WINDOW_MS and fetched together in one multi-coordinate
+    request, so a burst of requests from many cities costs one upstream
+    call instead of one per city. Misses of a cell go through
+    meteo_flight, so concurrent requests of the same cell, in this and
+    in the other workers, share one fetch. A background task refetches
+    the cells in use once per forecast cycle.
+
+    Forecasts are requested in the FlatBuffers format and the values
+    read in place from the answer. An answer that can not be read is
+    requested again as json, and json is used alone for the next
+    FLATBUFFERS_RETRY_SECONDS.
+    """
+
+    def __init__(self):
+        """Grid initialization."""
+        self.cells = OrderedDict()
+        self.batch = None
+        self.refresher = None
+        self.flatbuffers = METEO_FLATBUFFERS_ENABLED
+        self.json_until = 0.0
+        self.stats = {'hits': 0, 'misses': 0,
+                      'requests': 0, 'locations': 0, 'refreshed': 0}
+
+    async def start(self):
+        """Start the background refresh, called in the startup event."""
+        if self.refresher is None:
+            self.refresher = asyncio.ensure_future(self.keep_fresh())
+
+    async def stop(self):
+        """Stop the background refresh, called in the shutdown event."""
+        if self.refresher is not None:
+            self.refresher.cancel()
+        self.refresher = None
+
+    async def keep_fresh(self):
+        """Refetch the timelines used since the previous cycle."""
+        while True:
+            await asyncio.sleep(METEO_FORECAST_REFRESH_SECONDS)
+            since = time.time() - METEO_FORECAST_REFRESH_SECONDS
+            cells = [cell for cell, timeline in self.cells.items()
+                     if timeline.used_at >= since]
+            try:
+                for start in range(0, len(cells),
+                                   METEO_BATCH_MAX_LOCATIONS):
+                    await self.flush(ForecastBatch(
+                        cells[start:start + METEO_BATCH_MAX_LOCATIONS]))
+            except Exception as err:
+                # The next cycle must run anyway
+                msg = f"Falha ao renovar as previsões: {err!r}"
+                SysLog(__name__).show_log(TypeLog.warning.value, msg)
+            self.stats['refreshed'] += len(cells)
+
+    async def temperature(self, latitude: float, longitude: float) -> float:
+        """Current temperature of the cell containing the coordinates.
+
+        :param latitude: degrees
+        :param longitude: degrees
+        """
+        cell = geohash.encode(latitude, longitude, METEO_GEOHASH_PRECISION)
+        timeline = self.cells.get(cell)
+        if timeline is not None:
+            temperature = timeline.at(time.time())
+            if temperature is not None:
+                timeline.used_at = time.time()
+                self.cells.move_to_end(cell)
+                self.stats['hits'] += 1
+                return temperature
+
+        self.stats['misses'] += 1
+        timeline = await meteo_flight.do(cell, lambda: self.load(cell))
+        if self.cells.get(cell) is not timeline:
+            # Fetched by another worker
+            self.remember(cell, timeline)
+        temperature = timeline.at(time.time())
+        if temperature is None:
+            raise Utils.api_exception(message=invalid_answer,
+                                      status=status.HTTP_502_BAD_GATEWAY)
+        return temperature
+
+    async def load(self, cell: str) -> ForecastTimeline:
+        """Fetch the cell with the other cells missed in the window.
+
+        :param cell: geohash cell
+        """
+        batch = self.batch
+        if batch is None:
+            batch = self.batch = ForecastBatch()
+            asyncio.ensure_future(self.flush_later(batch))
+        batch.cells.append(cell)
+        if len(batch.cells) >= METEO_BATCH_MAX_LOCATIONS:
+            self.batch = None
+            asyncio.ensure_future(self.flush(batch))
+        return (await batch.done)[cell]
+
+    async def flush_later(self, batch: ForecastBatch) -> None:
+        """Fetch the batch once the batch window is over."""
+        await asyncio.sleep(METEO_BATCH_WINDOW_MS / 1000)
+        if self.batch is batch:
+            # Not already sent for being full
+            self.batch = None
+            await self.flush(batch)
+
+    async def flush(self, batch: ForecastBatch) -> None:
+        """Fetch the cells of the batch in one upstream request.
+
+        :param batch: at most METEO_BATCH_MAX_LOCATIONS cells
+        """
+        cells = batch.cells
+        self.stats['requests'] += 1
+        self.stats['locations'] += len(cells)
+        try:
+            timelines = await self.fetch(cells)
+        except Exception as err:
+            # Runs detached: every waiting caller must be answered.
+            # Timelines already in the grid stay in use meanwhile
+            msg = (f"Falha ao buscar a previsão de {len(cells)} células: "
+                   f"{err!r}")
+            SysLog(__name__).show_log(TypeLog.warning.value, msg)
+            if not isinstance(err, HTTPException):
+                # A malformed answer is the upstream's fault, not a 500
+                err = Utils.api_exception(message=invalid_answer,
+                                          status=status.HTTP_502_BAD_GATEWAY)
+            batch.done.set_exception(err)
+            return
+        for cell, timeline in zip(cells, timelines):
+            self.remember(cell, timeline)
+        batch.done.set_result(dict(zip(cells, timelines)))
+
+    def remember(self, cell: str, timeline: ForecastTimeline) -> None:
+        """Keep the timeline of the cell, evicting the least used cells."""
+        if cell in self.cells:
+            timeline.used_at = self.cells[cell].used_at
+        self.cells[cell] = timeline
+        self.cells.move_to_end(cell)
+        while len(self.cells) > METEO_CELL_CACHE_SIZE:
+            self.cells.popitem(last=False)
+
+    async def fetch(self, cells: list) -> list:
+        """Request the hourly forecast at the center of the cells.
+
+        :param cells: geohash cells
+        :returns: timelines in the order of the cells
+        """
+        centers = [geohash.center(cell) for cell in cells]
+        params = {
+            'latitude': ','.join(f'{lat:.4f}' for lat, _ in centers),
+            'longitude': ','.join(f'{lon:.4f}' for _, lon in centers),
+            'hourly': 'temperature_2m', 'timeformat': 'unixtime',
+            'past_hours': 1, 'forecast_hours': METEO_FORECAST_HOURS}
+        if self.use_flatbuffers:
+            response = await HttpClient.get(
+                OPEN_METEO_URL, params={**params, 'format': 'flatbuffers'})
+            try:
+                return self.read_flatbuffers(response, len(cells))
+            except (ValueError, TypeError, IndexError) as err:
+                msg = ("Previsão em FlatBuffers inválida, usando json: "
+                       f"{err!r}")
+                SysLog(__name__).show_log(TypeLog.warning.value, msg)
+                self.json_until = time.monotonic() + FLATBUFFERS_RETRY_SECONDS
+        response = await HttpClient.get(OPEN_METEO_URL, params=params)
+        return self.read_json(response, len(cells))
+
+    @property
+    def use_flatbuffers(self) -> bool:
+        """True when the next request asks for FlatBuffers."""
+        return self.flatbuffers and time.monotonic() >= self.json_until
+
+    @staticmethod
+    def read_flatbuffers(response, count: int) -> list:
+        """Timelines of a format=flatbuffers answer.
+
+        :param response: upstream answer
+        :param count: number of requested locations
+        """
+        if response.status_code != 200 \
+                or 'json' in response.headers.get('content-type', ''):
+            raise ValueError(f'resposta {response.status_code} '
+                             f'{response.headers.get("content-type")}')
+        locations = hourly_temperatures(response.content)
+        if len(locations) != count:
+            raise ValueError(f'{len(locations)} de {count} locais')
+        fetched_at = time.time()
+        return [ForecastTimeline(start, step, values, fetched_at)
+                for start, step, values in locations]
+
+    @staticmethod
+    def read_json(response, count: int) -> list:
+        """Timelines of a json answer.
+
+        :param response: upstream answer
+        :param count: number of requested locations
+        """
+        data = response.json()
+        # One location answers an object, many answer a list
+        if isinstance(data, dict):
+            data = [data]
+        if len(data) != count:
+            raise Utils.api_exception(message=invalid_answer,
+                                      status=status.HTTP_502_BAD_GATEWAY)
+        fetched_at = time.time()
+        return [ForecastTimeline.from_hours(
+                    location['hourly']['time'],
+                    location['hourly']['temperature_2m'], fetched_at)
+                for location in data]
+
+    def report(self) -> dict:
+        """Hit and batching counters."""
+        return {**self.stats, 'cells': len(self.cells),
+                'pending': len(meteo_flight.calls),
+                'flight': meteo_flight.stats,
+                'format': 'flatbuffers' if self.use_flatbuffers else 'json',
+                'max_cells': METEO_CELL_CACHE_SIZE}
+
+
+temperature_grid = TemperatureGrid()
 
 
 class OpenMeteoService:
@@ -7,22 +279,17 @@ class OpenMeteoService:
 
     def __init__(self):
         """Initialize this class."""
-        self.url = "https://api.open-meteo.com/v1/forecast"
+        self.url = OPEN_METEO_URL
 
-    def get_temperature(self, longitude, latitude):
+    async def get_temperature(self, longitude, latitude):
         """Get temperature.
 
         :param longitude: from my city or other
         :param latitude: from my city or other
         :returns temperature value
         """
-
-        responses = requests.get(self.url + '?latitude=' + latitude
-                                 + '&longitude=' + longitude +
-                                 '&current=temperature_2m')
-        data = responses.json()
-
-        return data['current']['temperature_2m']
+        return await temperature_grid.temperature(float(latitude),
+                                                  float(longitude))
 
     @staticmethod
     def get_pokemon_type_by_temperature(temperature):
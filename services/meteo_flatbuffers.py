@@ -0,0 +1,115 @@
+"""Decoding of the Open-Meteo FlatBuffers answers (format=flatbuffers).
+
+The answer holds one size prefixed WeatherApiResponse message per
+location. Only the hourly temperature_2m is needed, so the few fields
+on its path are read straight from the vtables of the openmeteo_sdk
+schema, and the values are a float32 view over the answer instead of
+one Python object per hour.
+"""
+import struct
+import sys
+
+from openmeteo_sdk.Variable import Variable
+
+# Field slots of the openmeteo_sdk schema
+RESPONSE_HOURLY = 11
+TIME_START, TIME_INTERVAL, TIME_VARIABLES = 0, 2, 3
+VARIABLE_KIND, VARIABLE_VALUES, VARIABLE_ALTITUDE = 0, 3, 5
+
+UOFFSET = struct.Struct('<I')
+SOFFSET = struct.Struct('<i')
+VOFFSET = struct.Struct('<H')
+INT64 = struct.Struct('<q')
+INT32 = struct.Struct('<i')
+INT16 = struct.Struct('<h')
+UINT8 = struct.Struct('<B')
+FLOAT32_SIZE = 4
+
+
+def field(data, table: int, slot: int) -> int:
+    """Position of the field in the buffer, 0 when it is absent.
+
+    :param data: whole answer
+    :param table: position of the table
+    :param slot: field index in the schema
+    """
+    vtable = table - SOFFSET.unpack_from(data, table)[0]
+    entry = 4 + 2 * slot
+    if entry >= VOFFSET.unpack_from(data, vtable)[0]:
+        return 0
+    offset = VOFFSET.unpack_from(data, vtable + entry)[0]
+    return table + offset if offset else 0
+
+
+def scalar(data, table: int, slot: int, kind: struct.Struct,
+           default: int = 0) -> int:
+    """Scalar field of the table, the schema default when absent."""
+    position = field(data, table, slot)
+    return kind.unpack_from(data, position)[0] if position else default
+
+
+def reference(data, table: int, slot: int) -> int:
+    """Position of the table or vector the field points to, 0 if absent."""
+    position = field(data, table, slot)
+    return position + UOFFSET.unpack_from(data, position)[0] \
+        if position else 0
+
+
+def float_values(data, vector: int):
+    """The float32 vector, read in place on little endian hosts.
+
+    :param data: whole answer, as a memoryview
+    :param vector: position of the vector length prefix
+    """
+    length = UOFFSET.unpack_from(data, vector)[0]
+    start = vector + 4
+    values = data[start:start + length * FLOAT32_SIZE]
+    if sys.byteorder == 'little':
+        return values.cast('f')
+    return list(struct.unpack(f'<{length}f', values))
+
+
+def hourly_temperature(data, response: int) -> tuple:
+    """Hourly temperature at 2 m of one WeatherApiResponse.
+
+    :param data: whole answer, as a memoryview
+    :param response: position of the WeatherApiResponse table
+    :returns: first hour epoch, seconds between values, values
+    """
+    hourly = reference(data, response, RESPONSE_HOURLY)
+    if not hourly:
+        raise ValueError('Resposta sem previsão horária')
+    variables = reference(data, hourly, TIME_VARIABLES)
+    count = UOFFSET.unpack_from(data, variables)[0] if variables else 0
+    for position in range(variables + 4, variables + 4 + 4 * count, 4):
+        variable = position + UOFFSET.unpack_from(data, position)[0]
+        if scalar(data, variable, VARIABLE_KIND, UINT8) \
+                == Variable.temperature \
+                and scalar(data, variable, VARIABLE_ALTITUDE, INT16) == 2:
+            values = reference(data, variable, VARIABLE_VALUES)
+            return (scalar(data, hourly, TIME_START, INT64),
+                    scalar(data, hourly, TIME_INTERVAL, INT32),
+                    float_values(data, values) if values else [])
+    raise ValueError('Resposta sem temperature_2m')
+
+
+def hourly_temperatures(content: bytes) -> list:
+    """Hourly temperature at 2 m of every location of the answer.
+
+    :param content: body of a format=flatbuffers forecast answer
+    :returns: (first hour epoch, seconds between values, values) per
+        location, in the order of the requested coordinates
+    """
+    data = memoryview(content)
+    locations = []
+    position = 0
+    try:
+        while position < len(data):
+            size = UOFFSET.unpack_from(data, position)[0]
+            root = position + 4
+            locations.append(hourly_temperature(
+                data, root + UOFFSET.unpack_from(data, root)[0]))
+            position = root + size
+    except struct.error as err:
+        raise ValueError(f'Mensagem truncada em {position}') from err
+    return locations
@@ -1,6 +1,49 @@
 """Access Pokémon API."""
-import requests
-import json
+import asyncio
+
+import orjson
+from fastapi import HTTPException, status
+from sqlalchemy.exc import SQLAlchemyError
+
+from database.postgres import SessionLocal
+from domain.pokemon import (Pokemon as PokeRules, PokemonRecord,
+                            PokemonTypeIndex)
+from models.pokeapi_mirror import PokeApiMirrorDTO
+from services.cache import CacheEntry, TieredCache
+from services.http_client import HttpClient
+from services.pokemon_names import PokemonNames
+from services.single_flight import SingleFlight
+from settings.infra import (POKEAPI_URL, POKEAPI_MIRROR_ENABLED,
+                            CACHE_MAX_BYTES, CACHE_TTL_POKEMON, CACHE_TTL_TYPE,
+                            NEGATIVE_TTL_POKEMON, NEGATIVE_TTL_TYPE,
+                            BATCH_CONCURRENCY, STREAM_CONCURRENCY)
+from settings.sys_logger import SysLog, TypeLog
+from utils.json_response import EncodedJson
+from utils.utils import Utils
+
+pokeapi_cache = TieredCache('pokeapi', CACHE_MAX_BYTES)
+pokeapi_flight = SingleFlight('pokeapi', encode=CacheEntry.encode,
+                              decode=CacheEntry.decode)
+
+no_pokemon = "Pokemon não encontrado com este nome: {}"
+no_pokemon_suggest = no_pokemon + ". Você quis dizer: {}?"
+no_type = "Tipo de pokémon não encontrado com este nome: {}"
+no_type_pokemon = "Sem pokémon para este typo {}!"
+unexpected_status = "PokeAPI respondeu {} para {}."
+
+# Projections memoized per cached pokémon, the others are built per call
+MAX_PROJECTIONS = 8
+
+resource_ttl = {
+    'pokemon': CACHE_TTL_POKEMON,
+    'type': CACHE_TTL_TYPE,
+}
+
+# Seconds a name the upstream does not know is answered locally
+missing_ttl = {
+    'pokemon': NEGATIVE_TTL_POKEMON,
+    'type': NEGATIVE_TTL_TYPE,
+}
 
 
 class Pokemon:
@@ -9,7 +52,7 @@ class Pokemon:
     def __init__(self):
         """Initialize the Pokémon class."""
         self.poke_name = None
-        self.url = 'https://pokeapi.co/api/v2/'
+        self.url = POKEAPI_URL
 
     async def get_pokemon(self, name):
         """Get a pokémon data from name in API.
@@ -18,11 +61,116 @@ class Pokemon:
         :returns: A dictionary of pokémon data
         """
         self.poke_name = name
-        pokemon = requests.get(f'{self.url}pokemon/' + self.poke_name)
-        if pokemon.status_code != 200:
+        return await self.get_resource('pokemon', self.poke_name)
+
+    @staticmethod
+    def unknown_name(name) -> str | None:
+        """Check the name in the local name index, before any lookup.
+
+        :param name: name or id of the pokémon
+        :returns: not found message with suggestions, None when the
+            pokémon may exist
+        """
+        suggestions = PokemonNames.suggestions(name)
+        if suggestions is None:
+            return None
+        if not suggestions:
+            return no_pokemon.format(name)
+        return no_pokemon_suggest.format(name, ', '.join(suggestions))
+
+    async def get_pokemon_record(self, name) -> PokemonRecord | None:
+        """Get the compact record of a pokémon, built once per cached
+        pokémon without keeping the decoded document.
+
+        :param name: The name of the pokémon
+        """
+        self.poke_name = name
+        entry = await self.get_entry('pokemon', self.poke_name)
+        if entry is None:
             return None
-        poke_info = json.loads(pokemon.text)
-        return poke_info
+        return entry.derive('record', lambda: PokemonRecord.from_data(
+            orjson.loads(entry.body)))
+
+    async def get_pokemon_json(self, name) -> EncodedJson | None:
+        """Get the raw upstream json of a pokémon, without decoding it.
+
+        :param name: The name of the pokémon
+        :returns: encoded json of the pokémon with its compressed forms
+        """
+        self.poke_name = name
+        entry = await self.get_entry('pokemon', self.poke_name)
+        if entry is None:
+            return None
+        return entry.derive('json', lambda: EncodedJson(entry.body, entry))
+
+    @staticmethod
+    async def get_pokemon_result(name, fields=()) -> dict:
+        """Get one pokémon as a batch/stream result item.
+
+        :param name: name or id of the pokémon
+        :param fields: sorted top level fields kept, empty for all
+        :returns: name and status with the pre-encoded data or the error
+        """
+        unknown = Pokemon.unknown_name(name)
+        if unknown:
+            return {'name': name, 'status': 404, 'detail': unknown}
+        try:
+            if fields:
+                poke_json = await Pokemon().get_pokemon_projection(
+                    name, fields)
+            else:
+                poke_json = await Pokemon().get_pokemon_json(name)
+        except HTTPException as err:
+            return {'name': name, 'status': err.status_code,
+                    'detail': err.detail}
+        if poke_json is None:
+            return {'name': name, 'status': 404,
+                    'detail': no_pokemon.format(name)}
+        return {'name': name, 'status': 200,
+                'data': orjson.Fragment(poke_json.identity)}
+
+    async def get_pokemon_batch(self, names: list, fields=()) -> list:
+        """Get many pokémon concurrently, with bounded fan-out.
+
+        :param names: names or ids of the pokémon
+        :param fields: sorted top level fields kept, empty for all
+        :returns: one result per name, in the same order
+        """
+        limit = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+        async def lookup(name):
+            async with limit:
+                return await self.get_pokemon_result(name, fields)
+
+        return await asyncio.gather(*[lookup(name) for name in names])
+
+    async def stream_pokemon(self, names, fields=()):
+        """Yield pokémon results as soon as each one resolves.
+
+        At most STREAM_CONCURRENCY lookups are in flight, so memory use
+        does not depend on how many names are streamed.
+
+        :param names: iterable of names or ids of the pokémon
+        :param fields: sorted top level fields kept, empty for all
+        """
+        names = iter(names)
+        pending = set()
+        try:
+            while True:
+                for name in names:
+                    pending.add(asyncio.ensure_future(
+                        self.get_pokemon_result(name, fields)))
+                    if len(pending) >= STREAM_CONCURRENCY:
+                        break
+                if not pending:
+                    return
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+        finally:
+            for task in pending:
+                task.cancel()
 
     async def get_pokemon_by_type(self, name):
         """Get all pokémon data from name in API.
@@ -30,8 +178,113 @@ class Pokemon:
         :param name: The name of the type
         """
         self.poke_name = name
-        pokemon = requests.get(f'{self.url}type/' + self.poke_name)
-        if pokemon.status_code != 200:
+        return await self.get_resource('type', self.poke_name)
+
+    async def get_pokemon_projection(self, name,
+                                     fields) -> EncodedJson | None:
+        """Get the json of a pokémon reduced to some fields.
+
+        :param name: The name of the pokémon
+        :param fields: sorted names of the top level fields kept
+        :returns: encoded json of the projected pokémon with its
+            compressed forms
+        """
+        self.poke_name = name
+        entry = await self.get_entry('pokemon', self.poke_name)
+        if entry is None:
+            return None
+
+        def build(owner=None):
+            # Decoded here, so the document is not kept with the entry
+            return EncodedJson(orjson.dumps(
+                PokeRules.project(orjson.loads(entry.body), fields)), owner)
+
+        key = 'fields:' + ','.join(fields)
+        if key in entry.derived or len(entry.derived) < MAX_PROJECTIONS:
+            return entry.derive(key, lambda: build(entry))
+        return build()
+
+    async def get_type_index(self, name) -> PokemonTypeIndex | None:
+        """Get the name index of a type, built once per cached type.
+
+        :param name: The name of the type
+        """
+        self.poke_name = name
+        entry = await self.get_entry('type', self.poke_name)
+        if entry is None:
+            return None
+        return entry.derive('type_index',
+                            lambda: PokemonTypeIndex(entry.data))
+
+    async def get_resource(self, resource, name):
+        """Get a resource through the cache.
+
+        :param resource: PokeAPI resource name (pokemon, type, ...)
+        :param name: The name or id of the resource
+        :returns: A dictionary of resource data
+        """
+        entry = await self.get_entry(resource, name)
+        return entry.data if entry else None
+
+    async def get_entry(self, resource, name) -> CacheEntry | None:
+        """Get the cached document of a resource.
+
+        :param resource: PokeAPI resource name (pokemon, type, ...)
+        :param name: The name or id of the resource
+        """
+        async def loader(stale):
+            return await self.load_entry(resource, name, stale)
+
+        return await pokeapi_cache.get_or_load(
+            f'{resource}:{name}', loader, flight=pokeapi_flight,
+            missing_ttl=missing_ttl.get(resource, NEGATIVE_TTL_POKEMON))
+
+    async def load_entry(self, resource, name, stale):
+        """Load a resource from the local mirror, falling back to API.
+
+        :param resource: PokeAPI resource name
+        :param name: The name or id of the resource
+        :param stale: expired cache entry revalidated with its etag
+        """
+        ttl = resource_ttl.get(resource, CACHE_TTL_POKEMON)
+        payload = await self.get_mirror(resource, name)
+        if payload is not None:
+            return CacheEntry(payload.encode(), ttl=ttl)
+
+        headers = {}
+        if stale is not None and stale.etag:
+            headers['If-None-Match'] = stale.etag
+        response = await HttpClient.get(f'{self.url}{resource}/{name}',
+                                        headers=headers)
+        if response.status_code == 304 and stale is not None:
+            return stale.revalidated(ttl)
+        if response.status_code == 404:
+            return None
+        if response.status_code != 200:
+            # Not an answer about the resource (403 from a proxy, ...):
+            # served stale when possible and never cached as missing
+            raise Utils.api_exception(
+                message=unexpected_status.format(response.status_code,
+                                                 f'{resource}/{name}'),
+                status=status.HTTP_502_BAD_GATEWAY)
+        return CacheEntry(response.content,
+                          etag=response.headers.get('etag'), ttl=ttl)
+
+    @staticmethod
+    async def get_mirror(resource, name):
+        """Get the raw json of a resource from the local mirror.
+
+        :param resource: PokeAPI resource name
+        :param name: The name or id of the resource
+        :returns: json text or None when not mirrored
+        """
+        if not POKEAPI_MIRROR_ENABLED:
+            return None
+        try:
+            async with SessionLocal() as session:
+                return await PokeApiMirrorDTO(session).get_payload(
+                    resource, name)
+        except (SQLAlchemyError, OSError) as err:
+            msg = f"Espelho PokeAPI indisponível: {err!r}"
+            SysLog(__name__).show_log(TypeLog.warning.value, msg)
             return None
-        type_info = json.loads(pokemon.text)
-        return type_info
@@ -0,0 +1,101 @@
+"""Index of the known pokémon names."""
+
+from fastapi import HTTPException
+from sqlalchemy.exc import SQLAlchemyError
+
+from database.postgres import SessionLocal
+from domain.name_index import NameIndex
+from models.pokeapi_mirror import PokeApiMirrorDTO
+from services.http_client import HttpClient
+from services.refresher import Refresher
+from settings.infra import (POKEAPI_URL, POKEAPI_MIRROR_ENABLED,
+                            NAME_INDEX_ENABLED, NAME_INDEX_REFRESH_SECONDS)
+
+
+class PokemonNames:
+    """App-lifetime index of the pokémon names.
+
+    Built from the PokeAPI name list joined with the names of the local
+    mirror, and rebuilt in background every NAME_INDEX_REFRESH_SECONDS.
+    The mirror may be partial (interrupted or per resource sync, pokémon
+    added since), so when PokeAPI cannot be listed the mirror names only
+    serve the search and every name is accepted. Until the first build
+    succeeds every name is accepted too, so the index never blocks a
+    valid lookup.
+    """
+
+    index: NameIndex = None
+    complete: bool = False
+    refresher = Refresher('Índice de nomes de pokémon',
+                          NAME_INDEX_REFRESH_SECONDS, NAME_INDEX_ENABLED)
+
+    @classmethod
+    async def init(cls):
+        """Start the background build, called in the startup event."""
+        await cls.refresher.start(cls.build)
+
+    @classmethod
+    async def close(cls):
+        """Stop the background build, called in the shutdown event."""
+        await cls.refresher.stop()
+
+    @classmethod
+    async def build(cls) -> bool:
+        """Build the index, True when built from the PokeAPI list."""
+        upstream = await cls.load_upstream_names()
+        mirror = await cls.load_mirror_names()
+        names = set(upstream or ()) | set(mirror or ())
+        if names:
+            cls.index = NameIndex(sorted(names))
+            cls.complete = upstream is not None
+        return cls.complete
+
+    @staticmethod
+    async def load_upstream_names() -> list | None:
+        """Names of every pokémon listed by PokeAPI, None on failure."""
+        try:
+            response = await HttpClient.get(f'{POKEAPI_URL}pokemon/',
+                                            params={'limit': 100000})
+            if response.status_code != 200:
+                raise ValueError(f'status {response.status_code}')
+            return [item['name'] for item in response.json()['results']]
+        except (HTTPException, ValueError, KeyError, TypeError) as err:
+            PokemonNames.refresher.log_error(err)
+            return None
+
+    @staticmethod
+    async def load_mirror_names() -> list | None:
+        """Names of the pokémon in the local mirror, None on failure."""
+        if not POKEAPI_MIRROR_ENABLED:
+            return None
+        try:
+            async with SessionLocal() as session:
+                return await PokeApiMirrorDTO(session).get_names('pokemon')
+        except (SQLAlchemyError, OSError) as err:
+            PokemonNames.refresher.log_error(err)
+            return None
+
+    @classmethod
+    def suggestions(cls, name: str, limit: int = 3) -> list | None:
+        """Did-you-mean names for an unknown pokémon.
+
+        :param name: name or id requested
+        :param limit: maximum number of suggestions
+        :returns: None when the name may exist (known, an id or the
+            index is not built from PokeAPI yet), else the closest
+            known names
+        """
+        if not cls.complete or name.isdigit() or name in cls.index:
+            return None
+        return cls.index.similar(name.lower(), limit)
+
+    @classmethod
+    def search(cls, query: str, limit: int) -> list | None:
+        """Names completing or close to the query, None when not built.
+
+        :param query: text typed by the client
+        :param limit: maximum number of names
+        """
+        if cls.index is None:
+            return None
+        return cls.index.search(query.strip().lower(), limit)
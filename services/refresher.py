@@ -0,0 +1,65 @@
+"""Background refresh of the app-lifetime indexes."""
+
+import asyncio
+from typing import Awaitable, Callable
+
+from settings.sys_logger import SysLog, TypeLog
+
+# Wait before trying again when a load was incomplete
+RETRY_SECONDS = 60
+
+
+class Refresher:
+    """Runs a load at startup and again after each refresh interval.
+
+    What is loaded is only an optimization, so failures are logged and
+    an incomplete load is tried again after RETRY_SECONDS.
+    """
+
+    def __init__(self, name: str, interval: int, enabled: bool = True):
+        """Refresher initialization.
+
+        :param name: what is loaded, for the log messages
+        :param interval: seconds between two complete loads
+        :param enabled: False never starts the background task
+        """
+        self.name = name
+        self.interval = interval
+        self.enabled = enabled
+        self.task = None
+
+    async def start(self, load: Callable[[], Awaitable[bool]]):
+        """Start the background task, called in the startup event.
+
+        :param load: coroutine function, True when the load is complete
+        """
+        if self.enabled and self.task is None:
+            self.task = asyncio.ensure_future(self.keep_fresh(load))
+
+    async def stop(self):
+        """Stop the background task, called in the shutdown event."""
+        if self.task is not None:
+            self.task.cancel()
+        self.task = None
+
+    async def keep_fresh(self, load: Callable[[], Awaitable[bool]]):
+        """Load now and again after each refresh interval."""
+        while True:
+            try:
+                complete = await load()
+            except Exception as err:
+                # The next load must run anyway
+                self.log_error(err)
+                complete = False
+            await asyncio.sleep(self.interval if complete
+                                else RETRY_SECONDS)
+
+    def log_error(self, err, subject: str = None) -> None:
+        """Log a failed load.
+
+        :param err: exception or description of the failure
+        :param subject: part of the load that failed
+        """
+        name = f'{self.name} de {subject}' if subject else self.name
+        msg = f"{name} indisponível: {err!r}"
+        SysLog(__name__).show_log(TypeLog.warning.value, msg)
@@ -0,0 +1,126 @@
+"""Resilience policies for the upstream services."""
+
+import time
+from collections import deque
+
+from settings.infra import (CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_OPEN_SECONDS,
+                            UPSTREAM_RETRY_BUDGET_RATIO,
+                            UPSTREAM_RETRY_BUDGET_MAX,
+                            UPSTREAM_HEDGE_MIN_SAMPLES)
+
+
+class CircuitBreaker:
+    """Stop calling an upstream after consecutive failures.
+
+    Closed: calls pass. Open: calls are refused for CIRCUIT_OPEN_SECONDS.
+    Half open: one probe call passes, closing the circuit on success or
+    opening it again on failure.
+    """
+
+    def __init__(self):
+        """Start closed."""
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    @property
+    def state(self) -> str:
+        """closed, open or half_open."""
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at < CIRCUIT_OPEN_SECONDS:
+            return 'open'
+        return 'half_open'
+
+    def allow(self) -> bool:
+        """True when a call may go to the upstream."""
+        state = self.state
+        if state == 'closed':
+            return True
+        if state == 'half_open' and not self.probing:
+            self.probing = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        """Close the circuit."""
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    def record_failure(self) -> None:
+        """Count the failure, opening the circuit over the threshold."""
+        self.failures += 1
+        if self.probing or self.failures >= CIRCUIT_FAILURE_THRESHOLD:
+            self.opened_at = time.monotonic()
+        self.probing = False
+
+
+class RetryBudget:
+    """Retries allowed as a fraction of the requests (token bucket).
+
+    Every request deposits UPSTREAM_RETRY_BUDGET_RATIO tokens and every
+    retry spends one, so a failing upstream gets at most that fraction of
+    extra load instead of a multiple of it.
+    """
+
+    def __init__(self):
+        """Start with a full budget."""
+        self.tokens = float(UPSTREAM_RETRY_BUDGET_MAX)
+
+    def deposit(self) -> None:
+        """Credit one request."""
+        self.tokens = min(UPSTREAM_RETRY_BUDGET_MAX,
+                          self.tokens + UPSTREAM_RETRY_BUDGET_RATIO)
+
+    def withdraw(self) -> bool:
+        """Spend one retry, False when the budget is exhausted."""
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class LatencyWindow:
+    """Latencies of the last successful calls."""
+
+    def __init__(self, size: int = 100):
+        """Initialization.
+
+        :param size: number of samples kept
+        """
+        self.samples = deque(maxlen=size)
+
+    def add(self, seconds: float) -> None:
+        """Record one latency."""
+        self.samples.append(seconds)
+
+    def percentile(self, rank: float) -> float | None:
+        """Latency at the rank (0-1), None without enough samples."""
+        if len(self.samples) < UPSTREAM_HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(rank * len(ordered)))]
+
+
+class Upstream:
+    """Resilience state of one upstream host."""
+
+    def __init__(self, host: str):
+        """Initialization.
+
+        :param host: upstream host name
+        """
+        self.host = host
+        self.breaker = CircuitBreaker()
+        self.budget = RetryBudget()
+        self.latency = LatencyWindow()
+        self.stats = {'requests': 0, 'failures': 0, 'retries': 0,
+                      'hedges': 0, 'rejected': 0}
+
+    def report(self) -> dict:
+        """Circuit state and counters."""
+        return {'circuit': self.breaker.state,
+                'retry_tokens': round(self.budget.tokens, 2),
+                'p95_seconds': self.latency.percentile(0.95),
+                **self.stats}
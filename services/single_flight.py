@@ -0,0 +1,165 @@
+"""Coalescing of concurrent identical upstream calls."""
+
+import asyncio
+import json
+import time
+from typing import Any, Awaitable, Callable
+from uuid import uuid4
+
+from aioredis import RedisError
+from fastapi import status
+
+from database.redis import redis_async
+from settings.infra import (SINGLE_FLIGHT_DISTRIBUTED, SINGLE_FLIGHT_LEASE_MS,
+                            SINGLE_FLIGHT_WAIT_MS, SINGLE_FLIGHT_POLL_MS,
+                            SINGLE_FLIGHT_RESULT_MS, SINGLE_FLIGHT_FALLBACK)
+from settings.sys_logger import SysLog, TypeLog
+from utils.utils import Utils
+
+upstream_busy = "Consulta {} em andamento em outro servidor, tente novamente."
+
+# Deletes the lease only if it still belongs to the caller
+release_script = """
+    if redis.call("GET", KEYS[1]) == ARGV[1] then
+        return redis.call("DEL", KEYS[1])
+    end
+    return 0
+"""
+
+
+class SingleFlight:
+    """Share one in-flight call between the callers of the same key.
+
+    The first caller of a key starts the call, the concurrent ones await
+    the same future, so upstream fan-out is bounded by distinct keys.
+
+    With a namespace and SINGLE_FLIGHT_DISTRIBUTED enabled the call is
+    also coalesced across workers and pods: the worker that takes a
+    short Redis lease does the call and publishes the result, the others
+    poll for it until the lease wait runs out.
+    """
+
+    def __init__(self, namespace: str = None,
+                 encode: Callable[[Any], bytes | str] = json.dumps,
+                 decode: Callable[[bytes], Any] = json.loads):
+        """Initialize the in-flight calls registry.
+
+        :param namespace: prefix of the redis keys, enables the
+            distributed mode
+        :param encode: serializes the result published in redis
+        :param decode: deserializes the result read from redis
+        """
+        self.namespace = namespace
+        self.encode = encode
+        self.decode = decode
+        self.calls = {}
+        self.stats = {'calls': 0, 'shared': 0,
+                      'leases': 0, 'waited': 0, 'fallbacks': 0}
+
+    @property
+    def distributed(self) -> bool:
+        """True when calls are coalesced across processes."""
+        return bool(self.namespace) and SINGLE_FLIGHT_DISTRIBUTED
+
+    async def do(self, key: str, call: Callable[[], Awaitable]):
+        """Run the call once for every concurrent caller of the key.
+
+        :param key: identity of the call
+        :param call: coroutine function doing the real work
+        :returns: result of the shared call
+        """
+        future = self.calls.get(key)
+        if future is None:
+            self.stats['calls'] += 1
+            if self.distributed:
+                future = asyncio.ensure_future(self.do_leased(key, call))
+            else:
+                future = asyncio.ensure_future(call())
+            self.calls[key] = future
+            future.add_done_callback(
+                lambda done: self.forget(key, done))
+        else:
+            self.stats['shared'] += 1
+        # A cancelled caller must not cancel the call of the others
+        return await asyncio.shield(future)
+
+    def forget(self, key: str, future: asyncio.Future) -> None:
+        """Remove the finished call from the registry."""
+        if self.calls.get(key) is future:
+            del self.calls[key]
+        if not future.cancelled():
+            # Mark the exception as retrieved when every caller is gone
+            future.exception()
+
+    async def do_leased(self, key: str, call: Callable[[], Awaitable]):
+        """Run the call under a Redis lease shared by every worker.
+
+        :param key: identity of the call
+        :param call: coroutine function doing the real work
+        """
+        lease_key = f"pokeservice:flight:{self.namespace}:{key}:lease"
+        result_key = f"pokeservice:flight:{self.namespace}:{key}:result"
+        token = uuid4().hex
+        try:
+            leased = await redis_async.set(lease_key, token, nx=True,
+                                           px=SINGLE_FLIGHT_LEASE_MS)
+        except (RedisError, OSError) as err:
+            self.log_redis_error(err)
+            return await call()
+
+        if leased:
+            self.stats['leases'] += 1
+            try:
+                result = await call()
+                try:
+                    await redis_async.set(result_key, self.encode(result),
+                                          px=SINGLE_FLIGHT_RESULT_MS)
+                except (RedisError, OSError) as err:
+                    # The waiters fall back after their wait runs out
+                    self.log_redis_error(err)
+                return result
+            finally:
+                await self.release(lease_key, token)
+
+        found, result = await self.wait_result(lease_key, result_key)
+        if found:
+            self.stats['waited'] += 1
+            return result
+        if not SINGLE_FLIGHT_FALLBACK:
+            raise Utils.api_exception(
+                message=upstream_busy.format(key),
+                status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.stats['fallbacks'] += 1
+        return await call()
+
+    async def wait_result(self, lease_key: str, result_key: str) -> tuple:
+        """Poll the result published by the lease holder.
+
+        :returns: (True, result) when published, (False, None) when the
+            wait ran out or the lease holder gave up
+        """
+        deadline = time.monotonic() + SINGLE_FLIGHT_WAIT_MS / 1000
+        try:
+            while time.monotonic() < deadline:
+                await asyncio.sleep(SINGLE_FLIGHT_POLL_MS / 1000)
+                raw = await redis_async.get(result_key)
+                if raw is not None:
+                    return True, self.decode(raw)
+                if await redis_async.get(lease_key) is None:
+                    break
+        except (RedisError, OSError) as err:
+            self.log_redis_error(err)
+        return False, None
+
+    async def release(self, lease_key: str, token: str) -> None:
+        """Release the lease if it was not taken over after expiring."""
+        try:
+            await redis_async.eval(release_script, 1, lease_key, token)
+        except (RedisError, OSError) as err:
+            self.log_redis_error(err)
+
+    @staticmethod
+    def log_redis_error(err):
+        """Redis is optional for the coalescing, only log the failure."""
+        msg = f"Coalescência distribuída indisponível: {err!r}"
+        SysLog(__name__).show_log(TypeLog.warning.value, msg)
@@ -0,0 +1,181 @@
+"""Hot set of the pokémon types chosen by temperature."""
+
+import asyncio
+import random
+
+from fastapi import HTTPException
+from sqlalchemy.exc import SQLAlchemyError
+
+from domain.pokemon import Pokemon as PokeRules, PokemonTypeIndex
+from services.meteo import TEMPERATURE_TYPES
+from services.pokeapi import Pokemon, no_pokemon, no_type, no_type_pokemon
+from services.refresher import Refresher
+from settings.infra import (HOT_SET_ENABLED, HOT_SET_REFRESH_SECONDS,
+                            HOT_SET_POKEMON_PER_TYPE, BATCH_CONCURRENCY)
+from utils.json_response import EncodedJson
+from utils.utils import Utils
+
+
+class HotType:
+    """Index, letter candidates and pinned pokémon of one type."""
+
+    __slots__ = ('index', 'candidates', 'details')
+
+    def __init__(self, index: PokemonTypeIndex, candidates: tuple,
+                 details: dict):
+        """Hot type initialization.
+
+        :param index: name index of the type
+        :param candidates: names with one of the route letters
+        :param details: encoded json of the pinned candidates, by name
+        """
+        self.index = index
+        self.candidates = candidates
+        self.details = details
+
+
+class TemperatureTypes:
+    """App-lifetime hot set of the types of the temperature route.
+
+    get_pokemon_type_by_temperature only answers TEMPERATURE_TYPES, so
+    their index, letter candidates and the json of up to
+    HOT_SET_POKEMON_PER_TYPE candidates each (0 for all of them) are
+    loaded at startup and rebuilt in background every
+    HOT_SET_REFRESH_SECONDS. The pinned json is held here, outside the
+    evictable caches. The route still draws among every candidate: a
+    pinned one is answered without any PokeAPI work, the others through
+    the cached lookup. Until a type is loaded the route falls back to
+    the lookup of the whole type.
+    """
+
+    hot: dict = {}
+    stats: dict = {'hits': 0, 'unpinned': 0, 'misses': 0, 'refreshed': 0}
+    refresher = Refresher('Conjunto quente', HOT_SET_REFRESH_SECONDS,
+                          HOT_SET_ENABLED)
+
+    @classmethod
+    async def init(cls):
+        """Start the background build, called in the startup event."""
+        await cls.refresher.start(cls.build)
+
+    @classmethod
+    async def close(cls):
+        """Stop the background build, called in the shutdown event."""
+        await cls.refresher.stop()
+
+    @classmethod
+    async def build(cls) -> bool:
+        """Build the hot set, True when every type was loaded."""
+        loaded = await asyncio.gather(*[
+            cls.load_type(type_name) for type_name in TEMPERATURE_TYPES])
+        for type_name, hot_type in zip(TEMPERATURE_TYPES, loaded):
+            # A type failing to refresh keeps its previous hot set
+            if hot_type is not None:
+                cls.hot[type_name] = hot_type
+        cls.stats['refreshed'] += 1
+        return all(loaded)
+
+    @classmethod
+    async def load_type(cls, type_name: str) -> HotType | None:
+        """Load the index and the pinned pokémon of one type.
+
+        :param type_name: one of TEMPERATURE_TYPES
+        """
+        try:
+            index = await Pokemon().get_type_index(type_name)
+        except (HTTPException, SQLAlchemyError, OSError) as err:
+            cls.refresher.log_error(err, type_name)
+            return None
+        if not index:
+            cls.refresher.log_error('tipo não encontrado', type_name)
+            return None
+        candidates = index.with_any_letter(''.join(PokeRules().letter))
+        pinned = candidates
+        if 0 < HOT_SET_POKEMON_PER_TYPE < len(candidates):
+            pinned = random.sample(candidates, HOT_SET_POKEMON_PER_TYPE)
+
+        limit = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+        async def fetch(name):
+            async with limit:
+                try:
+                    return await Pokemon().get_pokemon_json(name)
+                except (HTTPException, SQLAlchemyError, OSError) as err:
+                    cls.refresher.log_error(err, name)
+                    return None
+
+        details = await asyncio.gather(*[fetch(name) for name in pinned])
+        return HotType(index, candidates,
+                       {name: poke_json
+                        for name, poke_json in zip(pinned, details)
+                        if poke_json is not None})
+
+    @classmethod
+    def is_hot(cls, type_name: str) -> bool:
+        """True when the candidates of the type are loaded."""
+        hot_type = cls.hot.get(type_name)
+        return hot_type is not None and bool(hot_type.candidates)
+
+    @classmethod
+    async def choose(cls, type_name: str) -> EncodedJson:
+        """Random pokémon of the type with one of the route letters.
+
+        Drawn from the candidates of the hot set, or looked up through
+        the caches when the type is not loaded yet.
+
+        :param type_name: type chosen by the temperature
+        :returns: encoded json of the pokémon
+        """
+        if not cls.is_hot(type_name):
+            cls.count('misses')
+            return await cls.lookup(type_name)
+        hot_type = cls.hot[type_name]
+        poke_name = random.choice(hot_type.candidates)
+        poke_json = hot_type.details.get(poke_name)
+        if poke_json is not None:
+            cls.count('hits')
+            return poke_json
+        cls.count('unpinned')
+        poke_json = await Pokemon().get_pokemon_json(poke_name)
+        if not poke_json:
+            raise Utils.api_exception(message=no_pokemon.format(poke_name),
+                                      status=404)
+        return poke_json
+
+    @classmethod
+    def count(cls, outcome: str) -> None:
+        """Count how a request was answered.
+
+        :param outcome: hits, unpinned or misses
+        """
+        cls.stats[outcome] += 1
+
+    @staticmethod
+    async def lookup(type_name: str) -> EncodedJson:
+        """Random pokémon of the type through the cached lookups.
+
+        :param type_name: type chosen by the temperature
+        """
+        poke_api = Pokemon()
+        type_index = await poke_api.get_type_index(type_name)
+        if not type_index:
+            raise Utils.api_exception(message=no_type.format(type_name),
+                                      status=404)
+        poke_name = await PokeRules(
+            poke_type=True, index=type_index).get_pokemon_name_in_letter()
+        if not poke_name:
+            raise Utils.api_exception(
+                message=no_type_pokemon.format(type_name), status=404)
+        poke_json = await poke_api.get_pokemon_json(poke_name)
+        if not poke_json:
+            raise Utils.api_exception(message=no_pokemon.format(poke_name),
+                                      status=404)
+        return poke_json
+
+    @classmethod
+    def report(cls) -> dict:
+        """Hits and pinned pokémon by type."""
+        return {**cls.stats, 'types': {
+            type_name: {'candidates': len(hot_type.candidates),
+                        'pinned': len(hot_type.details)}
+            for type_name, hot_type in cls.hot.items()}}
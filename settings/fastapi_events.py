@@ -4,13 +4,39 @@ import aioredis
 from fastapi import FastAPI
 
 from database.redis import redis_url
+from services.cache_snapshot import CacheSnapshot
+from services.geocoding import Geocoding
+from services.http_client import HttpClient
+from services.meteo import temperature_grid
+from services.pokemon_names import PokemonNames
+from services.temperature_types import TemperatureTypes
 from settings.fastapi_limiter import FastAPILimiter
+from settings.infra import CACHE_SNAPSHOT_ENABLED
 
 
 def fastapi_events(app: FastAPI):
     """Start services before you upload the system."""
     @app.on_event("startup")
     async def startup():
-        """Creation of access limit to routes."""
+        """Creation of access limit to routes and upstream client,
+        warming the caches from their snapshot and the hot set."""
         redis = await aioredis.from_url(redis_url)
         await FastAPILimiter.init(redis)
+        await HttpClient.init()
+        await PokemonNames.init()
+        await Geocoding.init()
+        await temperature_grid.start()
+        if CACHE_SNAPSHOT_ENABLED:
+            await CacheSnapshot.load_all()
+        await TemperatureTypes.init()
+
+    @app.on_event("shutdown")
+    async def shutdown():
+        """Release the upstream client connections and snapshot caches."""
+        await PokemonNames.close()
+        await TemperatureTypes.close()
+        await Geocoding.close()
+        await temperature_grid.stop()
+        await HttpClient.close()
+        if CACHE_SNAPSHOT_ENABLED:
+            await CacheSnapshot.save_all()
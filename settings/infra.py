@@ -55,6 +55,129 @@ URL_EMAIL = config("URL_EMAIL", default=None)
 # RUNNING ENVIRONMENT
 AMBIENT = config("AMBIENT")
 
+# UPSTREAM BASE URLS
+POKEAPI_URL = config("POKEAPI_URL", default="https://pokeapi.co/api/v2/")
+OPEN_METEO_URL = config(
+    "OPEN_METEO_URL", default="https://api.open-meteo.com/v1/forecast")
+GEOCODING_URL = config(
+    "GEOCODING_URL",
+    default="https://geocoding-api.open-meteo.com/v1/search")
+
+# UPSTREAM HTTP CLIENT
+HTTP_CONNECT_TIMEOUT = float(config("HTTP_CONNECT_TIMEOUT", default="3"))
+HTTP_READ_TIMEOUT = float(config("HTTP_READ_TIMEOUT", default="10"))
+HTTP_MAX_CONNECTIONS = int(config("HTTP_MAX_CONNECTIONS", default="100"))
+HTTP_MAX_KEEPALIVE = int(config("HTTP_MAX_KEEPALIVE", default="20"))
+HTTP_KEEPALIVE_EXPIRY = float(config("HTTP_KEEPALIVE_EXPIRY", default="30"))
+HTTP_MAX_PER_HOST = int(config("HTTP_MAX_PER_HOST", default="20"))
+
+# UPSTREAM RESILIENCE
+UPSTREAM_DEADLINE_SECONDS = float(
+    config("UPSTREAM_DEADLINE_SECONDS", default="15"))
+UPSTREAM_MAX_RETRIES = int(config("UPSTREAM_MAX_RETRIES", default="2"))
+UPSTREAM_RETRY_BACKOFF_MS = int(
+    config("UPSTREAM_RETRY_BACKOFF_MS", default="100"))
+UPSTREAM_RETRY_BUDGET_RATIO = float(
+    config("UPSTREAM_RETRY_BUDGET_RATIO", default="0.1"))
+UPSTREAM_RETRY_BUDGET_MAX = int(
+    config("UPSTREAM_RETRY_BUDGET_MAX", default="10"))
+UPSTREAM_HEDGE_ENABLED = config(
+    "UPSTREAM_HEDGE_ENABLED", default="false").lower() == "true"
+UPSTREAM_HEDGE_MIN_SAMPLES = int(
+    config("UPSTREAM_HEDGE_MIN_SAMPLES", default="20"))
+CIRCUIT_FAILURE_THRESHOLD = int(
+    config("CIRCUIT_FAILURE_THRESHOLD", default="5"))
+CIRCUIT_OPEN_SECONDS = float(config("CIRCUIT_OPEN_SECONDS", default="30"))
+
+# POKEAPI LOCAL MIRROR
+POKEAPI_MIRROR_ENABLED = config(
+    "POKEAPI_MIRROR_ENABLED", default="true").lower() == "true"
+
+# UPSTREAM RESPONSE CACHE
+CACHE_MAX_BYTES = int(config("CACHE_MAX_BYTES", default="67108864"))
+CACHE_STALE_SECONDS = int(config("CACHE_STALE_SECONDS", default="604800"))
+CACHE_TTL_POKEMON = int(config("CACHE_TTL_POKEMON", default="86400"))
+CACHE_TTL_TYPE = int(config("CACHE_TTL_TYPE", default="86400"))
+CACHE_SWR_SECONDS = int(config("CACHE_SWR_SECONDS", default="3600"))
+CACHE_XFETCH_BETA = float(config("CACHE_XFETCH_BETA", default="1.0"))
+NEGATIVE_CACHE_MAX_ENTRIES = int(
+    config("NEGATIVE_CACHE_MAX_ENTRIES", default="10000"))
+NEGATIVE_TTL_POKEMON = int(config("NEGATIVE_TTL_POKEMON", default="300"))
+NEGATIVE_TTL_TYPE = int(config("NEGATIVE_TTL_TYPE", default="900"))
+NEGATIVE_TTL_CITY = int(config("NEGATIVE_TTL_CITY", default="600"))
+CACHE_SNAPSHOT_ENABLED = config(
+    "CACHE_SNAPSHOT_ENABLED", default="true").lower() == "true"
+CACHE_SNAPSHOT_DIR = config(
+    "CACHE_SNAPSHOT_DIR", default="/tmp/pokeservice/cache")
+
+# UPSTREAM CALL COALESCING
+SINGLE_FLIGHT_DISTRIBUTED = config(
+    "SINGLE_FLIGHT_DISTRIBUTED", default="false").lower() == "true"
+SINGLE_FLIGHT_LEASE_MS = int(config("SINGLE_FLIGHT_LEASE_MS", default="5000"))
+SINGLE_FLIGHT_WAIT_MS = int(config("SINGLE_FLIGHT_WAIT_MS", default="3000"))
+SINGLE_FLIGHT_POLL_MS = int(config("SINGLE_FLIGHT_POLL_MS", default="25"))
+SINGLE_FLIGHT_RESULT_MS = int(
+    config("SINGLE_FLIGHT_RESULT_MS", default="5000"))
+SINGLE_FLIGHT_FALLBACK = config(
+    "SINGLE_FLIGHT_FALLBACK", default="true").lower() == "true"
+
+# RESPONSE COMPRESSION
+COMPRESSION_MIN_BYTES = int(config("COMPRESSION_MIN_BYTES", default="1024"))
+COMPRESSION_GZIP_LEVEL = int(config("COMPRESSION_GZIP_LEVEL", default="6"))
+COMPRESSION_BROTLI_QUALITY = int(
+    config("COMPRESSION_BROTLI_QUALITY", default="6"))
+
+# POKEMON BATCH AND STREAM LOOKUP
+BATCH_MAX_ITEMS = int(config("BATCH_MAX_ITEMS", default="50"))
+BATCH_CONCURRENCY = int(config("BATCH_CONCURRENCY", default="10"))
+STREAM_CONCURRENCY = int(config("STREAM_CONCURRENCY", default="10"))
+
+# GEOCODING
+GEOCODING_LRU_SIZE = int(config("GEOCODING_LRU_SIZE", default="5000"))
+GEOCODING_STORE_ENABLED = config(
+    "GEOCODING_STORE_ENABLED", default="true").lower() == "true"
+GAZETTEER_ENABLED = config(
+    "GAZETTEER_ENABLED", default="true").lower() == "true"
+GAZETTEER_PATH = config(
+    "GAZETTEER_PATH", default=str(Path(__file__).parent.parent / 'data'
+                                  / 'gazetteer' / 'cities.idx'))
+
+# TEMPERATURE GRID
+METEO_GEOHASH_PRECISION = int(config("METEO_GEOHASH_PRECISION", default="5"))
+METEO_CELL_CACHE_SIZE = int(config("METEO_CELL_CACHE_SIZE", default="20000"))
+METEO_BATCH_WINDOW_MS = int(config("METEO_BATCH_WINDOW_MS", default="20"))
+METEO_BATCH_MAX_LOCATIONS = int(
+    config("METEO_BATCH_MAX_LOCATIONS", default="100"))
+METEO_FORECAST_HOURS = int(config("METEO_FORECAST_HOURS", default="48"))
+METEO_FORECAST_REFRESH_SECONDS = int(
+    config("METEO_FORECAST_REFRESH_SECONDS", default="3600"))
+METEO_FLATBUFFERS_ENABLED = config(
+    "METEO_FLATBUFFERS_ENABLED", default="true").lower() == "true"
+
+# POKEMON NAME INDEX
+NAME_INDEX_ENABLED = config(
+    "NAME_INDEX_ENABLED", default="true").lower() == "true"
+NAME_INDEX_REFRESH_SECONDS = int(
+    config("NAME_INDEX_REFRESH_SECONDS", default="86400"))
+NAME_SEARCH_MAX_RESULTS = int(config("NAME_SEARCH_MAX_RESULTS", default="20"))
+
+# TEMPERATURE HOT SET
+HOT_SET_ENABLED = config("HOT_SET_ENABLED", default="true").lower() == "true"
+HOT_SET_REFRESH_SECONDS = int(
+    config("HOT_SET_REFRESH_SECONDS", default="3600"))
+HOT_SET_POKEMON_PER_TYPE = int(
+    config("HOT_SET_POKEMON_PER_TYPE", default="25"))
+
+# TEMPERATURE ROUTE PIPELINE
+PIPELINE_SPECULATION_ENABLED = config(
+    "PIPELINE_SPECULATION_ENABLED", default="true").lower() == "true"
+PIPELINE_GEOCODING_BUDGET_MS = float(
+    config("PIPELINE_GEOCODING_BUDGET_MS", default="3000"))
+PIPELINE_METEO_BUDGET_MS = float(
+    config("PIPELINE_METEO_BUDGET_MS", default="3000"))
+PIPELINE_POKEMON_BUDGET_MS = float(
+    config("PIPELINE_POKEMON_BUDGET_MS", default="3000"))
+
 # ROUTE CLICK LIMITER
 LIMITER = [Depends(RateLimiter(times=5, seconds=3))]
 
@@ -0,0 +1,37 @@
+"""PokeAPI local mirror ingestion command.
+
+Usage:
+    python sync_pokeapi.py               -> incremental resync
+    python sync_pokeapi.py --full        -> refetch every resource
+    python sync_pokeapi.py -r pokemon -r type
+"""
+
+import argparse
+import asyncio
+
+from database.postgres import SessionLocal
+from domain.pokeapi_mirror import PokeApiMirrorSync
+from models.pokeapi_mirror import MIRROR_RESOURCES
+from services.http_client import HttpClient
+
+
+async def sync_pokeapi(incremental: bool, resources: list) -> dict:
+    """Run the mirror synchronization."""
+    await HttpClient.init()
+    try:
+        async with SessionLocal() as session:
+            return await PokeApiMirrorSync(
+                session, incremental=incremental).sync(resources)
+    finally:
+        await HttpClient.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--full", action="store_true",
+                        help="refetch every resource, ignoring etags")
+    parser.add_argument("-r", "--resource", action="append",
+                        choices=list(MIRROR_RESOURCES),
+                        help="resource to synchronize, defaults to all")
+    args = parser.parse_args()
+    print(asyncio.run(sync_pokeapi(not args.full, args.resource)))
@@ -0,0 +1,104 @@
+"""Responses for json documents already encoded."""
+
+import gzip
+import sys
+
+import brotli
+from starlette.requests import Request
+from starlette.responses import Response
+
+from settings.infra import (COMPRESSION_MIN_BYTES, COMPRESSION_GZIP_LEVEL,
+                            COMPRESSION_BROTLI_QUALITY)
+
+# Preferred first when the client accepts both with the same weight
+SUPPORTED_ENCODINGS = ('br', 'gzip')
+
+
+class EncodedJson:
+    """Json bytes kept with their compressed forms."""
+
+    __slots__ = ('identity', 'variants', 'owner')
+
+    def __init__(self, identity: bytes, owner=None):
+        """Initialization.
+
+        :param identity: the uncompressed json
+        :param owner: cache entry keeping this json, its size grows by
+            each compressed form
+        """
+        self.identity = identity
+        self.variants = {}
+        self.owner = owner
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held, the identity aside when it is the owner body."""
+        shared = self.owner is not None and self.identity is self.owner.body
+        return (sys.getsizeof(self) + (0 if shared else len(self.identity))
+                + sum(map(len, self.variants.values())))
+
+    def encoded(self, encoding: str) -> bytes:
+        """Body compressed with the encoding, compressed only once."""
+        if encoding not in self.variants:
+            if encoding == 'br':
+                variant = brotli.compress(
+                    self.identity, quality=COMPRESSION_BROTLI_QUALITY)
+            else:
+                variant = gzip.compress(
+                    self.identity, compresslevel=COMPRESSION_GZIP_LEVEL)
+            self.variants[encoding] = variant
+            if self.owner is not None:
+                self.owner.grow(len(variant))
+        return self.variants[encoding]
+
+
+def negotiate_encoding(accept_encoding: str) -> str | None:
+    """Best supported encoding of an Accept-Encoding header.
+
+    :param accept_encoding: header value, e.g. "gzip, br;q=0.9"
+    :return: br, gzip or None for identity
+    """
+    weights = {}
+    for item in accept_encoding.lower().split(','):
+        name, _, params = item.strip().partition(';')
+        weight = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[name.strip()] = weight
+
+    best, best_weight = None, 0.0
+    for encoding in SUPPORTED_ENCODINGS:
+        weight = weights.get(encoding, weights.get('*', 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+class RawJSONResponse(Response):
+    """Send cached json bytes as they are, with no decode/encode cycle."""
+
+    media_type = "application/json"
+
+    @classmethod
+    def negotiated(cls, request: Request,
+                   document: EncodedJson) -> 'RawJSONResponse':
+        """Response in the encoding accepted by the client.
+
+        Documents smaller than COMPRESSION_MIN_BYTES are sent as is.
+
+        :param request: client request
+        :param document: json with its precompressed forms
+        """
+        headers = {'Vary': 'Accept-Encoding'}
+        encoding = None
+        if len(document.identity) >= COMPRESSION_MIN_BYTES:
+            encoding = negotiate_encoding(
+                request.headers.get('accept-encoding', ''))
+        if encoding is None:
+            return cls(document.identity, headers=headers)
+        headers['Content-Encoding'] = encoding
+        return cls(document.encoded(encoding), headers=headers)